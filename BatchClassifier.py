@@ -0,0 +1,339 @@
+# BatchClassifier.py
+import CONSTANTS
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from IQIngest import IQSpectrogramStream
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+IQ_EXTENSIONS = (".iq", ".cf32")
+OUTPUT_FORMATS = ("jsonl", "parquet")
+
+def isCapture(path):
+    return path.lower().endswith(IQ_EXTENSIONS)
+
+def collectFiles(inputs):
+    """
+    Expand directories, list files (one path per line), image paths and raw
+    IQ captures into a sorted list of paths; split captures off with isCapture().
+    """
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for filename in sorted(os.listdir(entry), key = lambda p: (len(p), p)):
+                if filename.lower().endswith(IMAGE_EXTENSIONS + IQ_EXTENSIONS):
+                    files.append(os.path.join(entry, filename))
+        elif entry.lower().endswith(IMAGE_EXTENSIONS + IQ_EXTENSIONS):
+            files.append(entry)
+        else:
+            with open(entry) as f:
+                files.extend(line.strip() for line in f if line.strip())
+    return files
+
+
+class JsonLinesWriter:
+    """Appends one JSON object per classified file; the file is flushed after every batch."""
+    def __init__(self, path):
+        self.path = path
+        self.trimPartialLine()
+        self.file = open(path, "a")
+
+    def trimPartialLine(self):
+        """Cut an interrupted run's unfinished last line, so appended rows start on a line of their own."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                chunk = min(65536, position)
+                f.seek(position - chunk)
+                newline = f.read(chunk).rfind(b"\n")
+                if newline != -1:
+                    position = position - chunk + newline + 1
+                    break
+                position -= chunk
+            if position != end:
+                f.truncate(position)
+
+    def completed(self):
+        """Files already written without error, so a rerun can skip them."""
+        done = set()
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # Partial last line from an interrupted run
+                if not row.get("error"):
+                    done.add(row["file"])
+        return done
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Writes each batch as its own part file in a directory, since Parquet
+    files cannot be appended to. Detections are stored as a JSON string
+    column so every part has the same schema. Needs pyarrow or fastparquet.
+    """
+    def __init__(self, path):
+        import pandas as pd
+        self.pd = pd
+        self.path = path
+        os.makedirs(path, exist_ok = True)
+        self.part = len([p for p in os.listdir(path) if p.endswith(".parquet")])
+        self.lock = threading.Lock()
+
+    def completed(self):
+        done = set()
+        for part in sorted(os.listdir(self.path)):
+            if part.endswith(".parquet"):
+                frame = self.pd.read_parquet(os.path.join(self.path, part), columns = ["file", "error"])
+                done.update(frame.loc[frame["error"].isna(), "file"])
+        return done
+
+    def write(self, rows):
+        if not rows:
+            return
+        frame = self.pd.DataFrame([dict(row, detections = json.dumps(row["detections"])) for row in rows],
+                                  columns = ["file", "detections", "count", "gated", "modelVersion", "error",
+                                             "classifiedAt", "worker", "tiles", "tileMs"])
+        with self.lock:
+            partPath = os.path.join(self.path, f"part-{self.part:05d}.parquet")
+            self.part += 1
+        frame.to_parquet(partPath, index = False)
+
+    def close(self):
+        pass
+
+
+WRITERS = {"jsonl": JsonLinesWriter, "parquet": ParquetWriter}
+
+
+class BatchClassifier:
+    """
+    Headless bulk classification of archived spectrograms.
+
+    Files are split into batches that run through the model in one forward
+    pass each, with `workers` batches in flight at once. Results are written
+    as each batch completes (so output order follows completion, not input
+    order), and files already in the output are skipped on a rerun. A batch
+    that fails as a whole is retried file by file so one bad image only
+    costs its own row.
+    """
+    def __init__(self, registry, gate = None, tiled = False, batchSize = CONSTANTS.BATCH_SIZE,
+                 workers = CONSTANTS.BATCH_WORKERS, progressInterval = CONSTANTS.BATCH_PROGRESS_INTERVAL):
+        self.registry = registry
+        self.gate = gate
+        self.tiled = tiled
+        self.batchSize = max(1, batchSize)
+        self.workers = max(1, workers)
+        self.progressInterval = progressInterval
+        self.lock = threading.Lock()
+        self.stats = {"total": 0, "skipped": 0, "classified": 0, "gated": 0, "failed": 0}
+
+    def row(self, filePath, detections = None, error = None, gated = False, version = None, tileStats = None):
+        tileStats = tileStats or {}
+        return {
+            "file": filePath,
+            "detections": detections or [],
+            "count": len(detections or []),
+            "gated": gated,
+            "modelVersion": version,
+            "error": error,
+            "classifiedAt": time.time(),
+            # Tiled mode only: how many tiles the frame took and the model time they cost
+            "tiles": tileStats.get("tiles"),
+            "tileMs": tileStats.get("totalMs")
+        }
+
+    def classifyOne(self, model, version, filePath):
+        tileStats = {}
+        result = model.classifyTiled(filePath, stats = tileStats) if self.tiled else model.classify(filePath)
+        if len(result) == 2 and result[0] == CONSTANTS.FAILURE:
+            return self.row(filePath, error = result[1], version = version)
+        return self.row(filePath, result, version = version, tileStats = tileStats)
+
+    def classifyBatch(self, filePaths):
+        """Classify one batch; returns a row per file."""
+        rows, pending = [], []
+        for filePath in filePaths:
+            if self.gate is not None and not self.gate.passes(filePath):
+                rows.append(self.row(filePath, gated = True))
+            else:
+                pending.append(filePath)
+        if not pending:
+            return rows
+
+        version, model = self.registry.current()
+        if self.tiled or len(pending) == 1:
+            return rows + [self.classifyOne(model, version, filePath) for filePath in pending]
+        results = model.classifyBatch(pending)
+        if len(results) == 2 and results[0] == CONSTANTS.FAILURE:
+            return rows + [self.classifyOne(model, version, filePath) for filePath in pending]
+        return rows + [self.row(filePath, detections, version = version)
+                       for filePath, detections in zip(pending, results)]
+
+    def record(self, rows):
+        with self.lock:
+            for row in rows:
+                if row["error"]:
+                    self.stats["failed"] += 1
+                elif row["gated"]:
+                    self.stats["gated"] += 1
+                else:
+                    self.stats["classified"] += 1
+
+    def progress(self, start, final = False):
+        with self.lock:
+            done = self.stats["classified"] + self.stats["gated"] + self.stats["failed"]
+            todo = self.stats["total"] - self.stats["skipped"]
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed else 0.0
+            eta = (todo - done) / rate if rate else 0.0
+            line = (f"{done}/{todo} files, {rate:.1f} files/s, {self.stats['failed']} failed, "
+                    f"{self.stats['gated']} gated, ETA {eta:.0f}s")
+        print(("Done: " if final else "Progress: ") + line, file = sys.stderr, flush = True)
+
+    def run(self, filePaths, output, outputFormat = "jsonl", resume = True):
+        """Classify filePaths into output; returns the stats dict."""
+        if outputFormat not in WRITERS:
+            raise ValueError(f"Unsupported output format {outputFormat}; expected one of {OUTPUT_FORMATS}")
+        writer = WRITERS[outputFormat](output)
+        try:
+            done = writer.completed() if resume else set()
+            todo = [filePath for filePath in filePaths if filePath not in done]
+            self.stats = {"total": len(filePaths), "skipped": len(filePaths) - len(todo),
+                          "classified": 0, "gated": 0, "failed": 0}
+            if self.stats["skipped"]:
+                print(f"Resuming: {self.stats['skipped']} file(s) already in {output}", file = sys.stderr)
+
+            start = lastReport = time.perf_counter()
+            batches = (todo[i:i + self.batchSize] for i in range(0, len(todo), self.batchSize))
+            # Keep only a window of batches in flight, so memory does not grow with the archive.
+            window = self.workers * 2
+            with ThreadPoolExecutor(max_workers = self.workers) as pool:
+                futures = {}
+                for batch in batches:
+                    futures[pool.submit(self.classifyBatch, batch)] = batch
+                    if len(futures) >= window:
+                        lastReport = self.drain(futures, writer, start, lastReport)
+                while futures:
+                    lastReport = self.drain(futures, writer, start, lastReport)
+            self.progress(start, final = True)
+        finally:
+            writer.close()
+        return dict(self.stats)
+
+    def runCaptures(self, captures, output, engine, sampleFormat = "complex64", outputFormat = "jsonl",
+                    resume = True):
+        """
+        Classify raw IQ captures into output through engine.classifyIQ: frames
+        are computed in memory and go to the model with no JPEG in between.
+        Rows are keyed "capture#frame"; frames already in the output are not
+        computed again on a rerun. The gate and tiling apply to images only.
+        """
+        if outputFormat not in WRITERS:
+            raise ValueError(f"Unsupported output format {outputFormat}; expected one of {OUTPUT_FORMATS}")
+        writer = WRITERS[outputFormat](output)
+        try:
+            done = writer.completed() if resume else set()
+            total = 0
+            for capture in captures:
+                try:
+                    total += len(IQSpectrogramStream(capture, sampleFormat))
+                except Exception:
+                    total += 1  # Reported as one failed row below
+            self.stats = {"total": total, "skipped": 0, "classified": 0, "gated": 0, "failed": 0}
+            start = lastReport = time.perf_counter()
+            for capture in captures:
+                skip = {name for name in done if name.startswith(os.path.basename(capture) + "#")}
+                self.stats["skipped"] += len(skip)
+                rows = []
+                for detections, frameName in engine.classifyIQ(capture, sampleFormat, skip):
+                    version, _ = engine.registry.current()
+                    if frameName is None:
+                        rows.append(self.row(os.path.basename(capture), error = detections[1]))
+                    elif len(detections) == 2 and detections[0] == CONSTANTS.FAILURE:
+                        rows.append(self.row(frameName, error = detections[1], version = version))
+                    else:
+                        rows.append(self.row(frameName, detections, version = version))
+                    if len(rows) >= self.batchSize:
+                        writer.write(rows)
+                        self.record(rows)
+                        rows = []
+                    if time.perf_counter() - lastReport >= self.progressInterval:
+                        lastReport = time.perf_counter()
+                        self.progress(start)
+                writer.write(rows)
+                self.record(rows)
+            self.progress(start, final = True)
+        finally:
+            writer.close()
+        return dict(self.stats)
+
+    def drain(self, futures, writer, start, lastReport):
+        """Write the batches that have finished and forget their futures; returns the last report time."""
+        finished, _ = wait(futures, return_when = FIRST_COMPLETED)
+        for future in finished:
+            batch = futures.pop(future)
+            try:
+                rows = future.result()
+            except Exception as e:
+                rows = [self.row(filePath, error = f"Batch failed: {e}") for filePath in batch]
+            writer.write(rows)
+            self.record(rows)
+        if time.perf_counter() - lastReport >= self.progressInterval:
+            lastReport = time.perf_counter()
+            self.progress(start)
+        return lastReport
+
+    def runDistributed(self, filePaths, output, broker, outputFormat = "jsonl", resume = True, pollSeconds = 1.0,
+                       gateThreshold = None):
+        """
+        Like run(), but publishes the files to a WorkBroker and stores the
+        results inference nodes push back. Paths must be reachable by every node.
+        Tiling and the gate threshold are sent with the items for the nodes to apply.
+        """
+        if outputFormat not in WRITERS:
+            raise ValueError(f"Unsupported output format {outputFormat}; expected one of {OUTPUT_FORMATS}")
+        writer = WRITERS[outputFormat](output)
+        try:
+            done = writer.completed() if resume else set()
+            todo = [filePath for filePath in filePaths if filePath not in done]
+            self.stats = {"total": len(filePaths), "skipped": len(filePaths) - len(todo),
+                          "classified": 0, "gated": 0, "failed": 0}
+            broker.submit(todo, {"tiled": self.tiled, "gateThreshold": gateThreshold})
+            start = lastReport = time.perf_counter()
+            while True:
+                results = broker.collect()
+                rows = [dict(self.row(result["file"], result["detections"], result["error"], result["gated"],
+                                      result["modelVersion"], result["tileStats"]), worker = result["worker"])
+                        for result in results]
+                writer.write(rows)
+                self.record(rows)
+                if not results and broker.outstanding() == 0:
+                    break
+                if time.perf_counter() - lastReport >= self.progressInterval:
+                    lastReport = time.perf_counter()
+                    self.progress(start)
+                    for node, stats in broker.status()["nodes"].items():
+                        print(f"  {node}: {stats['completed']} done, {stats['itemsPerSecond']:.1f} files/s, "
+                              f"{stats['leased']} leased, {stats['reclaimed']} reclaimed", file = sys.stderr)
+                if not results:
+                    time.sleep(pollSeconds)
+            self.progress(start, final = True)
+        finally:
+            writer.close()
+        return dict(self.stats)
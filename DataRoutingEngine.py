@@ -1,18 +1,37 @@
 # DataRoutingEngine.py
 import CONSTANTS
-from runModelOnImage import modelAPI
-from collections import deque
+from runModelOnImage import createRegistry
+from SourceScheduler import WeightedFairScheduler
+from FrameScheduler import PriorityFrameQueue, POLICIES
+from BandProcessor import FrameBands
+from SignalGate import EnergyGate
+from IQIngest import IQSpectrogramStream
+from BatchClassifier import BatchClassifier, collectFiles, isCapture, OUTPUT_FORMATS
+from IQIngest import SAMPLE_FORMATS
+from WorkBroker import WorkBroker, serveBroker, parseAddress, runWorker
+from TunedConfig import loadTunedConfig
+import argparse
+import threading
 import time
 import cv2
 import os
 
 class DataRoutingEngine:
      
-    def __init__(self, inputDirectory = None):
+    def __init__(self, inputDirectory = None, tiled = False, registry = None, policy = CONSTANTS.FRAME_POLICY,
+                 maxAge = CONSTANTS.FRAME_MAX_AGE, gate = None):
         self.classifiedFiles = set()
-        self.inputSpectrograms = deque()
+        # Pluggable ordering ("fifo" or "newest"); frames older than maxAge seconds are dropped.
+        self.inputSpectrograms = PriorityFrameQueue(inputDirectory, policy, maxAge)
+        self.lastHighInterference = False
+        # Cheap pre-filter; frames it rejects skip the full model
+        self.gate = gate if gate is not None else EnergyGate()
         self.inputFolder = inputDirectory
-        self.modelAPI = modelAPI()
+        # Engines for different sources can share one model registry; the active
+        # model can be hot-swapped through it without restarting the engine.
+        self.registry = registry if registry is not None else createRegistry(warmupFolder = inputDirectory or "images")
+        # Tiled mode keeps wide spectrograms at full resolution instead of letterboxing them
+        self.tiled = tiled
         self.running = False
         self.paused = False
         
@@ -30,21 +49,45 @@ class DataRoutingEngine:
         self.inputSpectrograms.extend(sorted(os.listdir(plotsDirectory), key = lambda p: (len(p), p)))
         return len(self.inputSpectrograms)
 
-    def sendNextToClassifier(self):
+    def nextSpectrogram(self):
+        droppedBefore = self.inputSpectrograms.stats["dropped"]
         while self.inputSpectrograms and self.inputSpectrograms[0] in self.classifiedFiles:
             self.logEntry("WARNING: " + self.inputSpectrograms[0] + " already classified")
             self.inputSpectrograms.popleft()
 
         if not self.inputSpectrograms:
             successfulReset = self.resetFileTracking()
-            if not successfulReset:
+            # Re-queued files can all be past maxAge and dropped straight away.
+            if not successfulReset or not self.inputSpectrograms:
                 self.logEntry("ERROR: no spectrogram left to classify")
-                return None, None
+                return None
 
         nextClassification = self.inputSpectrograms.popleft()
+        dropped = self.inputSpectrograms.stats["dropped"] - droppedBefore
+        if dropped:
+            self.logEntry(f"WARNING: dropped {dropped} stale spectrogram(s) past the deadline")
+        return nextClassification
+
+    def sendNextToClassifier(self):
+        nextClassification = self.nextSpectrogram()
+        if nextClassification is None:
+            return None, None
 
         try:
-            classifiedData = self.modelAPI.classify(self.inputFolder + "/" + nextClassification)
+            filePath = self.inputFolder + "/" + nextClassification
+            if not self.gate.passes(filePath):
+                self.classifiedFiles.add(nextClassification)
+                self.lastHighInterference = False
+                return [], nextClassification
+            _, model = self.registry.current()
+            if self.tiled:
+                tileStats = {}
+                classifiedData = model.classifyTiled(filePath, stats = tileStats)
+                if tileStats:
+                    self.logEntry(f"Tiled {nextClassification}: {tileStats['tiles']} tiles, "
+                                  f"{tileStats['totalMs']:.0f} ms ({tileStats['msPerTile']:.1f} ms/tile)")
+            else:
+                classifiedData = model.classify(filePath)
             if len(classifiedData) == 2 and classifiedData[0] == CONSTANTS.FAILURE:
                 self.logEntry("ERROR: " + classifiedData[1])
                 return None, None
@@ -53,11 +96,100 @@ class DataRoutingEngine:
             return None, None
 
         self.classifiedFiles.add(nextClassification)
+
+        # Frames written around a high-interference frame jump the queue.
+        self.lastHighInterference = self.isHighInterference(nextClassification, classifiedData)
+        if self.lastHighInterference:
+            self.inputSpectrograms.flag(nextClassification)
         
         # Return the detection data and the filename.
         annotated_filename = nextClassification
         return classifiedData, annotated_filename
 
+    def sendNextToRing(self, ring, timeout = None):
+        """
+        Decode the next spectrogram straight into a SharedFrameRing slot.
+        Returns (slot, filename); later stages pass only the slot index and
+        the final holder releases the slot.
+        """
+        nextClassification = self.nextSpectrogram()
+        if nextClassification is None:
+            return None, None
+
+        slot = ring.acquire(timeout)
+        if slot is None:
+            self.inputSpectrograms.appendleft(nextClassification)
+            self.logEntry("WARNING: frame ring full, " + nextClassification + " deferred")
+            return None, None
+
+        try:
+            image = cv2.imread(self.inputFolder + "/" + nextClassification)
+            if image is None:
+                raise ValueError("image could not be decoded")
+            # The model expects RGB; convert straight into the shared slot.
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst = ring.reserve(slot, image.shape[0], image.shape[1]))
+        except Exception as e:
+            ring.release(slot)
+            self.logEntry(f"ERROR DECODING FILE {nextClassification} into frame ring: {e}")
+            return None, None
+
+        self.classifiedFiles.add(nextClassification)
+        return slot, nextClassification
+
+    def classifyIQ(self, iqPath, sampleFormat = "complex64", skip = ()):
+        """
+        Classify spectrogram frames computed straight from a raw IQ capture,
+        with no JPEG encode/decode in between. Yields (detections, frameName);
+        a failed frame yields (FAILURE, message) in place of its detections,
+        and a capture that cannot be opened yields it once with frameName None.
+        Frames named in skip are not computed.
+        """
+        try:
+            stream = IQSpectrogramStream(iqPath, sampleFormat)
+        except Exception as e:
+            self.logEntry(f"ERROR opening IQ capture {iqPath}: {e}")
+            yield (CONSTANTS.FAILURE, f"Error opening IQ capture: {e}"), None
+            return
+
+        for index in range(len(stream)):
+            frameName = stream.frameName(index)
+            if frameName in skip:
+                continue
+            _, model = self.registry.current()
+            classifiedData = model.classifyArray(stream.frame(index))
+            if len(classifiedData) == 2 and classifiedData[0] == CONSTANTS.FAILURE:
+                self.logEntry("ERROR: " + classifiedData[1])
+            yield classifiedData, frameName
+
+    def publishToBroker(self, broker):
+        """
+        Hand every queued spectrogram to a WorkBroker instead of classifying
+        it here; items go out as absolute paths, so the input folder must be
+        on storage the inference nodes share. Returns the broker's item ids.
+        """
+        paths = []
+        while self.inputSpectrograms:
+            filename = self.inputSpectrograms.popleft()
+            if filename in self.classifiedFiles:
+                continue
+            paths.append(os.path.abspath(os.path.join(self.inputFolder, filename)))
+            self.classifiedFiles.add(filename)
+        return broker.submit(paths)
+
+    def isHighInterference(self, filename, detections):
+        # The model stamps the frame width on each detection; no detections means no occupancy.
+        if not detections:
+            return False
+        try:
+            width = detections[0]["imageWidth"]
+            return FrameBands(detections).occupancy(width)["All"] >= CONSTANTS.HIGH_INTERFERENCE_RATIO
+        except Exception as e:
+            self.logEntry(f"ERROR measuring interference for {filename}: {e}")
+            return False
+
+    def framePath(self, filename):
+        return os.path.abspath(os.path.join(self.inputFolder, filename))
+
     def resetFileTracking(self):
         filesToUnclassify = sorted(list(self.classifiedFiles), key = lambda p: (len(p), p))
         if not filesToUnclassify: return False
@@ -105,6 +237,8 @@ class DataRoutingEngine:
             print(file + ": classified")
         for file in self.inputSpectrograms:
             print(file + ": unclassified")
+        print("Queue: " + ", ".join(f"{k} {v}" for k, v in self.inputSpectrograms.stats.items()))
+        print("Gate: " + ", ".join(f"{k} {v}" for k, v in self.gate.rates().items()))
 
     def run(self):
         while self.running:
@@ -129,8 +263,149 @@ class DataRoutingEngine:
             else:
                 print(f"Unknown command: {command}")
 
+class MultiSourceRouter:
+    """
+    Routes several spectrogram folders through one shared model.
+    Each source keeps its own queue and counters; sources are served by
+    weighted fair scheduling. Exposes the same calls ServiceWorker uses
+    on a single DataRoutingEngine.
+    """
+    def __init__(self, sources, tiled = False, policy = CONSTANTS.FRAME_POLICY, maxAge = CONSTANTS.FRAME_MAX_AGE):
+        # sources: {name: (directory, weight)}
+        self.registry = createRegistry()
+        self.gate = EnergyGate()
+        self.engines = {}
+        self.scheduler = WeightedFairScheduler()
+        self.lastSource = None
+        for name, (directory, weight) in sources.items():
+            self.addSource(name, directory, weight, tiled, policy, maxAge)
+
+    def addSource(self, name, directory, weight = CONSTANTS.DEFAULT_SOURCE_WEIGHT, tiled = False,
+                  policy = CONSTANTS.FRAME_POLICY, maxAge = CONSTANTS.FRAME_MAX_AGE):
+        self.engines[name] = DataRoutingEngine(directory, tiled, self.registry, policy, maxAge, self.gate)
+        self.scheduler.add(name, weight)
+
+    def removeSource(self, name):
+        self.engines.pop(name, None)
+        self.scheduler.remove(name)
+
+    def sendNextToClassifier(self):
+        ready = {name for name, engine in self.engines.items()
+                 if engine.inputSpectrograms or engine.classifiedFiles}
+        source = self.scheduler.next(ready)
+        self.lastSource = source
+        if source is None:
+            self.logEntry("ERROR: no source has spectrograms left to classify")
+            return None, None
+        engine = self.engines[source]
+        classifiedData, filename = engine.sendNextToClassifier()
+        self.scheduler.record(source, classifiedData is not None)
+        # A source that just showed high interference is served more often for a while.
+        if classifiedData is not None and engine.lastHighInterference:
+            self.scheduler.boost(source)
+        return classifiedData, filename
+
+    def framePath(self, filename):
+        """Path of a frame served by the most recently scheduled source."""
+        return self.engines[self.lastSource].framePath(filename)
+
+    def counters(self):
+        counters = {name: dict(counts) for name, counts in self.scheduler.counters.items()}
+        for name, engine in self.engines.items():
+            counters[name]["queue"] = dict(engine.inputSpectrograms.stats)
+        return counters
+
+    def reset(self):
+        for engine in self.engines.values():
+            engine.reset()
+        self.scheduler.reset()
+
+    def logEntry(self, msg):
+        with open("service_log.txt", "a") as log_file:
+            log_file.write(msg + f" at {time.ctime()}\n")
+
+def runBatch(args):
+    """Headless mode: classify every given file as fast as the hardware allows and exit."""
+    inputs = collectFiles(args.inputs)
+    filePaths = [path for path in inputs if not isCapture(path)]
+    captures = [path for path in inputs if isCapture(path)]
+    if not inputs:
+        print("No spectrograms found in " + ", ".join(args.inputs))
+        return 1
+    if captures:
+        # Raw IQ captures skip the JPEG round trip: frames are computed in memory and classified in place.
+        if args.broker:
+            print("IQ captures cannot be distributed through --broker; classify them locally")
+            return 1
+        registry = createRegistry(warmupFolder = os.path.dirname(filePaths[0]) if filePaths else "images")
+        engine = DataRoutingEngine(registry = registry)
+        batch = BatchClassifier(registry, batchSize = args.batch_size)
+        stats = batch.runCaptures(captures, args.output, engine, args.sample_format, args.format,
+                                  resume = not args.no_resume)
+        print("Captures: " + ", ".join(f"{k} {v}" for k, v in stats.items()))
+        if not filePaths:
+            return 1 if stats["failed"] else 0
+        failed = stats["failed"]
+    else:
+        failed = 0
+    if args.broker:
+        # Distributed: nodes running WorkBroker.py pull the files; --workers local threads help out.
+        broker = WorkBroker()
+        serveBroker(broker, parseAddress(args.broker))
+        print(f"Broker listening on {args.broker}")
+        if args.workers:
+            registry = createRegistry(warmupFolder = os.path.dirname(filePaths[0]) or ".")
+            for index in range(args.workers):
+                threading.Thread(target = runWorker, args = (broker, registry, f"local-{index}", args.batch_size),
+                                 daemon = True).start()
+        batch = BatchClassifier(None, tiled = args.tiled, batchSize = args.batch_size)
+        stats = batch.runDistributed([os.path.abspath(p) for p in filePaths], args.output, broker, args.format,
+                                     resume = not args.no_resume, gateThreshold = args.gate_threshold)
+        print("Nodes: " + ", ".join(f"{name} {node['completed']}" for name, node in broker.status()["nodes"].items()))
+    else:
+        registry = createRegistry(warmupFolder = os.path.dirname(filePaths[0]) or ".")
+        gate = EnergyGate(args.gate_threshold) if args.gate_threshold else None
+        batch = BatchClassifier(registry, gate, args.tiled, args.batch_size, args.workers)
+        stats = batch.run(filePaths, args.output, args.format, resume = not args.no_resume)
+    print("Batch: " + ", ".join(f"{k} {v}" for k, v in stats.items()))
+    return 1 if stats["failed"] or failed else 0
+
+def parseArgs():
+    tuned = loadTunedConfig()
+    parser = argparse.ArgumentParser(description = "Route spectrograms to the classifier. With no inputs, "
+                                                   "polls the images folder as a service.")
+    parser.add_argument("inputs", nargs = "*", help = "Directories, image files, raw IQ captures (.iq, .cf32) "
+                                                      "or text files listing one path per line")
+    parser.add_argument("--sample-format", choices = SAMPLE_FORMATS, default = "complex64",
+                        help = "Sample format of raw IQ captures (int16 is interleaved I/Q)")
+    parser.add_argument("--output", help = "Results file (jsonl) or directory of part files (parquet)")
+    parser.add_argument("--format", choices = OUTPUT_FORMATS, default = "jsonl")
+    parser.add_argument("--batch-size", type = int, default = tuned["batchSize"])
+    parser.add_argument("--workers", type = int, default = tuned["workers"], help = "Batches in flight at once")
+    parser.add_argument("--tiled", action = "store_true", help = "Classify at full resolution in tiles")
+    parser.add_argument("--gate-threshold", type = float, default = CONSTANTS.GATE_THRESHOLD,
+                        help = "Skip frames the energy gate scores below this (0 disables)")
+    parser.add_argument("--policy", choices = sorted(POLICIES), default = CONSTANTS.FRAME_POLICY,
+                        help = "Service mode: order in which queued frames are served")
+    parser.add_argument("--max-age", type = float, default = CONSTANTS.FRAME_MAX_AGE,
+                        help = "Service mode: drop frames older than this many seconds")
+    parser.add_argument("--no-resume", action = "store_true", help = "Reclassify files already in the output")
+    parser.add_argument("--broker", help = "Serve the files on host:port for WorkBroker.py nodes (bind to an "
+                                           "explicit host to accept other machines; needs SPECTROGRAM_BROKER_KEY); "
+                                           "--workers then counts local worker threads (0 for none)")
+    args = parser.parse_args()
+    if args.inputs and not args.output:
+        parser.error("--output is required when inputs are given")
+    if args.broker and not os.environ.get("SPECTROGRAM_BROKER_KEY"):
+        parser.error("--broker needs SPECTROGRAM_BROKER_KEY set to a shared secret")
+    return args
+
 if __name__ == "__main__":
-    service = DataRoutingEngine('images')
+    args = parseArgs()
+    if args.inputs:
+        raise SystemExit(runBatch(args))
+
+    service = DataRoutingEngine('images', args.tiled, policy = args.policy, maxAge = args.max_age)
     try:
         service.start()
         while service.running:
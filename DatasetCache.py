@@ -0,0 +1,101 @@
+# DatasetCache.py
+"""
+Read the letterboxed image cache written by build_dataset.py.
+
+Frames come straight from dataset/cache/images.u8 (memory-mapped, so only the
+pages a batch touches are read) with their labels from cache/labels.npy; no
+JPEG is decoded. DatasetCache is a map-style dataset (len + indexing), so it
+can be handed to a torch DataLoader with collate_fn=collate, which stacks a
+batch the way YOLOv5 expects targets: rows of (image in batch, class, cx, cy, w, h).
+
+    python DatasetCache.py
+    python DatasetCache.py --split train --batch-size 32 --shuffle
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from build_dataset import DEFAULT_OUTPUT, splitName
+import CONSTANTS
+
+
+class DatasetCache:
+    def __init__(self, root=DEFAULT_OUTPUT, split=None, valFraction=CONSTANTS.DATASET_VAL_FRACTION):
+        """Usable frames of the cache under root/cache; split is "train", "val" or None for both."""
+        self.cacheDir = os.path.join(root, "cache")
+        with open(os.path.join(self.cacheDir, "index.json")) as f:
+            index = json.load(f)
+        self.shape = tuple(index["shape"])
+        self.dtype = index["dtype"]
+        self.classes = index["classes"]
+        # Same split rule as train.txt / val.txt, so both views of the dataset agree.
+        self.frames = [frame for frame in index["frames"] if frame["valid"]
+                       and (split is None or splitName(frame["image"], valFraction) == split)]
+
+        labels = np.load(os.path.join(self.cacheDir, "labels.npy"))
+        labels = labels[np.argsort(labels[:, 0], kind="stable")]
+        # Rows of cache slot i are labels[starts[i]:ends[i]].
+        slots = np.arange(self.shape[0])
+        self.starts = np.searchsorted(labels[:, 0], slots, side="left")
+        self.ends = np.searchsorted(labels[:, 0], slots, side="right")
+        self.labels = labels[:, 1:]
+        self.images = None
+
+    def open(self):
+        # Opened on first use, so loader worker processes map the file instead of receiving a copy.
+        if self.images is None:
+            self.images = np.memmap(os.path.join(self.cacheDir, "images.u8"), dtype=self.dtype, mode="r",
+                                    shape=self.shape)
+        return self.images
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["images"] = None
+        return state
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i):
+        """(RGB uint8 frame of shape (size, size, 3), float32 labels of shape (k, 5): class, cx, cy, w, h)."""
+        slot = self.frames[i]["index"]
+        return np.asarray(self.open()[slot]), self.labels[self.starts[slot]:self.ends[slot]]
+
+    def batches(self, batchSize, shuffle=False, seed=0):
+        """Yield collated batches; slots are read in ascending order within a batch to keep reads sequential."""
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for start in range(0, len(order), batchSize):
+            yield collate([self[i] for i in np.sort(order[start:start + batchSize])])
+
+
+def collate(items):
+    """Stack (image, labels) pairs into (B, size, size, 3) images and (M, 6) targets tagged with the batch position."""
+    images = np.stack([image for image, _ in items])
+    targets = [np.column_stack((np.full(len(labels), i, dtype=np.float32), labels))
+               for i, (_, labels) in enumerate(items)]
+    return images, (np.concatenate(targets) if targets else np.zeros((0, 6), dtype=np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Iterate the memory-mapped dataset cache and report throughput.")
+    parser.add_argument("--root", default=DEFAULT_OUTPUT, help="Output folder of build_dataset.py")
+    parser.add_argument("--split", choices=("train", "val"))
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--shuffle", action="store_true")
+    args = parser.parse_args()
+
+    dataset = DatasetCache(args.root, args.split)
+    frames = boxes = 0
+    start = time.perf_counter()
+    for images, targets in dataset.batches(args.batch_size, args.shuffle):
+        frames += len(images)
+        boxes += len(targets)
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames, {boxes} boxes in {elapsed:.2f}s ({frames / max(elapsed, 1e-9):.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# FramePipeline.py
+import CONSTANTS
+import argparse
+import multiprocessing as mp
+import os
+import time
+from ModelRegistry import ModelRegistry
+from SharedFrameRing import SharedFrameRing, inferenceWorker, renderWorker
+
+def runPipeline(inputFolder, outputFolder, workers=1, modelPath=None, slots=CONSTANTS.RING_SLOTS):
+    """
+    Classify a folder of spectrograms with decode, inference and rendering in
+    separate processes joined by a SharedFrameRing. This process decodes each
+    frame straight into a ring slot; only (slot, filename) tuples and the
+    detections cross process boundaries, never the frames. Returns the number
+    of frames decoded.
+    """
+    from DataRoutingEngine import DataRoutingEngine
+    ctx = mp.get_context("spawn")
+    ring = SharedFrameRing(slots, ctx=ctx)
+    slotQueue, resultQueue = ctx.Queue(), ctx.Queue()
+    inference = [ctx.Process(target=inferenceWorker, args=(ring, slotQueue, resultQueue, modelPath, inputFolder),
+                             daemon=True) for _ in range(workers)]
+    renderer = ctx.Process(target=renderWorker, args=(ring, resultQueue, outputFolder), daemon=True)
+    for process in inference + [renderer]:
+        process.start()
+
+    # The decode stage never runs the model; an empty registry keeps it from loading one.
+    engine = DataRoutingEngine(inputFolder, registry=ModelRegistry(None))
+    decoded = 0
+    start = time.perf_counter()
+    try:
+        while engine.inputSpectrograms:
+            slot, filename = engine.sendNextToRing(ring)  # Blocks while every slot is in use downstream
+            if slot is not None:
+                slotQueue.put((slot, filename))
+                decoded += 1
+        for _ in inference:
+            slotQueue.put(None)
+        for process in inference:
+            process.join()
+        resultQueue.put(None)
+        renderer.join()
+    finally:
+        ring.close()
+    elapsed = time.perf_counter() - start
+    print(f"Pipeline: {decoded} frames in {elapsed:.1f}s ({decoded / max(elapsed, 1e-9):.1f} frames/s, "
+          f"{workers} inference process(es))")
+    return decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode, classify and render spectrograms in separate processes.")
+    parser.add_argument("input", nargs="?", default="images", help="Folder of spectrograms")
+    parser.add_argument("--output", default="annotated", help="Folder for the annotated frames")
+    parser.add_argument("--workers", type=int, default=1, help="Inference processes")
+    parser.add_argument("--model", help="Model weights (default Model/best.pt)")
+    parser.add_argument("--slots", type=int, default=CONSTANTS.RING_SLOTS, help="Frames in flight at once")
+    args = parser.parse_args()
+    runPipeline(os.path.abspath(args.input), os.path.abspath(args.output), args.workers, args.model, args.slots)
+
+
+if __name__ == "__main__":
+    main()
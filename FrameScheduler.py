@@ -0,0 +1,162 @@
+# FrameScheduler.py
+import CONSTANTS
+import bisect
+import heapq
+import itertools
+import os
+import time
+
+##############################################
+# Ordering Policies (smaller key is served first)
+##############################################
+class FifoPolicy:
+    """Filename order, as the routing engine has always served frames."""
+    def key(self, filename, mtime):
+        return (len(filename), filename)
+
+
+class NewestFirstPolicy:
+    """Most recently written frame first, so operators see current conditions under backlog."""
+    def key(self, filename, mtime):
+        return (-mtime, len(filename), filename)
+
+
+POLICIES = {"fifo": FifoPolicy, "newest": NewestFirstPolicy}
+
+
+class PriorityFrameQueue:
+    """
+    Heap-backed replacement for the routing engine's deque of filenames.
+    Enqueue and dequeue are O(log n). Frames older than maxAge seconds are
+    dropped whenever the queue is read or counted, wherever they sit in the
+    heap, and frames written close to a frame flagged as high interference
+    are served ahead of the rest.
+    A flag re-pushes only the frames inside its window as boosted copies;
+    the copies they replace are skipped when they reach the top of the heap.
+    Supports the deque operations DataRoutingEngine uses.
+    """
+    def __init__(self, folder=None, policy="fifo", maxAge=None, boostWindow=CONSTANTS.FRAME_BOOST_WINDOW):
+        self.folder = folder
+        self.policy = POLICIES[policy]() if isinstance(policy, str) else policy
+        self.maxAge = maxAge
+        self.boostWindow = boostWindow
+        self.heap = []      # (notBoosted, policyKey, seq, filename, mtime); may hold superseded entries
+        self.live = {}      # seq -> current heap entry for each queued frame
+        self.byTime = []    # sorted (mtime, seq), to find the frames a flag boosts
+        self.arrivals = []  # seq min-heap, to detect reordering
+        self.removed = set()
+        self.flags = []     # mtimes of recently flagged frames
+        self.counter = itertools.count()
+        self.stats = {"enqueued": 0, "served": 0, "dropped": 0, "reordered": 0, "boosted": 0}
+        self.droppedFiles = []
+
+    def modifiedTime(self, filename):
+        try:
+            return os.path.getmtime(os.path.join(self.folder, filename)) if self.folder else time.time()
+        except OSError:
+            return time.time()
+
+    def isBoosted(self, mtime):
+        return any(abs(mtime - flagged) <= self.boostWindow for flagged in self.flags)
+
+    def enqueue(self, entry):
+        heapq.heappush(self.heap, entry)
+        self.live[entry[2]] = entry
+
+    def push(self, filename, mtime=None, seq=None):
+        mtime = self.modifiedTime(filename) if mtime is None else mtime
+        seq = next(self.counter) if seq is None else seq
+        self.enqueue((0 if self.isBoosted(mtime) else 1, self.policy.key(filename, mtime), seq, filename, mtime))
+        # New frames are usually the newest, so the insert lands at the end of the list.
+        bisect.insort(self.byTime, (mtime, seq))
+        heapq.heappush(self.arrivals, seq)
+        self.stats["enqueued"] += 1
+
+    def append(self, filename):
+        self.push(filename)
+
+    def extend(self, filenames):
+        for filename in filenames:
+            self.push(filename)
+
+    def appendleft(self, filename):
+        # A deferred frame goes back with top priority so it is retried next.
+        mtime = self.modifiedTime(filename)
+        seq = next(self.counter)
+        self.enqueue((-1, (), seq, filename, mtime))
+        heapq.heappush(self.arrivals, seq)
+
+    def flag(self, filename, mtime=None):
+        """Mark a frame as high interference; frames written near it are boosted."""
+        mtime = self.modifiedTime(filename) if mtime is None else mtime
+        self.flags.append(mtime)
+        self.flags = self.flags[-CONSTANTS.FRAME_BOOST_FLAGS_KEPT:]
+        start = bisect.bisect_left(self.byTime, (mtime - self.boostWindow, -1))
+        end = bisect.bisect_right(self.byTime, (mtime + self.boostWindow, float("inf")))
+        for _, seq in self.byTime[start:end]:
+            entry = self.live.get(seq)
+            if entry is not None and entry[0] == 1:
+                self.enqueue((0,) + entry[1:])
+
+    def discardStale(self):
+        # Drop heap entries superseded by a boosted copy or already served.
+        while self.heap and self.live.get(self.heap[0][2]) is not self.heap[0]:
+            heapq.heappop(self.heap)
+        if len(self.byTime) > 2 * len(self.live) + 64:
+            self.byTime = [(mtime, seq) for mtime, seq in self.byTime if seq in self.live]
+
+    def dropExpired(self):
+        # Expired frames are a prefix of the time index whatever the policy; deferred frames are not in it.
+        if self.maxAge is not None and self.byTime:
+            end = bisect.bisect_left(self.byTime, (time.time() - self.maxAge, -1))
+            for _, seq in self.byTime[:end]:
+                entry = self.live.pop(seq, None)
+                if entry is None:
+                    continue
+                self.removed.add(seq)
+                self.stats["dropped"] += 1
+                self.droppedFiles.append(entry[3])
+            del self.byTime[:end]
+            self.droppedFiles = self.droppedFiles[-CONSTANTS.FRAME_DROPPED_KEPT:]
+        self.discardStale()
+
+    def popleft(self):
+        self.dropExpired()
+        if not self.heap:
+            raise IndexError("pop from an empty frame queue")
+        boosted, _, seq, filename, _ = heapq.heappop(self.heap)
+        del self.live[seq]
+        while self.arrivals and self.arrivals[0] in self.removed:
+            self.removed.discard(heapq.heappop(self.arrivals))
+        if self.arrivals and self.arrivals[0] != seq:
+            self.stats["reordered"] += 1
+        self.removed.add(seq)
+        self.stats["served"] += 1
+        if boosted == 0:
+            self.stats["boosted"] += 1
+        return filename
+
+    def __getitem__(self, index):
+        if index != 0:
+            raise IndexError("only the head of a frame queue can be inspected")
+        self.dropExpired()
+        if not self.heap:
+            raise IndexError("frame queue is empty")
+        return self.heap[0][3]
+
+    def __len__(self):
+        self.dropExpired()
+        return len(self.live)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        return iter([entry[3] for entry in sorted(self.live.values())])
+
+    def clear(self):
+        self.heap.clear()
+        self.live.clear()
+        self.byTime.clear()
+        self.arrivals.clear()
+        self.removed.clear()
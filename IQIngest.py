@@ -0,0 +1,78 @@
+# IQIngest.py
+import CONSTANTS
+import os
+import cv2
+import numpy as np
+
+SAMPLE_FORMATS = ("complex64", "int16")
+
+class IQSpectrogramStream:
+    """
+    Streams spectrogram frames straight from a raw IQ capture.
+
+    The capture is memory-mapped (complex64, or int16 interleaved I/Q) and
+    read one frame's worth of samples at a time. Each frame is a vectorized
+    STFT: rows are time, columns are frequency with DC in the middle, the
+    same layout as the rendered spectrogram JPEGs. Power in dB is scaled
+    against the frame's own noise floor and colored with the colormap the
+    training frames use, giving an RGB uint8 array that can go straight to
+    modelAPI.classifyArray or a SharedFrameRing slot with no JPEG round trip.
+    """
+    def __init__(self, path, sampleFormat="complex64", nfft=CONSTANTS.IQ_NFFT, rowsPerFrame=CONSTANTS.IQ_ROWS_PER_FRAME,
+                 hop=None, frameSize=CONSTANTS.IQ_FRAME_SIZE, dynamicRange=CONSTANTS.IQ_DYNAMIC_RANGE_DB):
+        if sampleFormat not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format {sampleFormat}; expected one of {SAMPLE_FORMATS}")
+        self.path = path
+        self.sampleFormat = sampleFormat
+        self.nfft = nfft
+        self.rowsPerFrame = rowsPerFrame
+        self.hop = hop or nfft
+        self.frameSize = frameSize
+        self.dynamicRange = dynamicRange
+        self.window = np.hanning(nfft).astype(np.float32)
+        if sampleFormat == "complex64":
+            self.samples = np.memmap(path, dtype=np.complex64, mode="r")
+        else:
+            self.samples = np.memmap(path, dtype=np.int16, mode="r").reshape(-1, 2)
+        self.samplesPerFrame = (rowsPerFrame - 1) * self.hop + nfft
+
+    def __len__(self):
+        if len(self.samples) < self.samplesPerFrame:
+            return 0
+        return (len(self.samples) - self.samplesPerFrame) // (self.rowsPerFrame * self.hop) + 1
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.frameName(index), self.frame(index)
+
+    def frameName(self, index):
+        return f"{os.path.basename(self.path)}#{index}"
+
+    def chunk(self, index):
+        start = index * self.rowsPerFrame * self.hop
+        raw = self.samples[start:start + self.samplesPerFrame]
+        if self.sampleFormat == "int16":
+            # Only this frame's samples are converted; the rest of the file stays on disk.
+            return (raw[:, 0].astype(np.float32) + 1j * raw[:, 1].astype(np.float32)).astype(np.complex64)
+        return np.asarray(raw)
+
+    def powerDb(self, samples):
+        """STFT power in dB, shape (rowsPerFrame, nfft)."""
+        stride = samples.strides[0]
+        segments = np.lib.stride_tricks.as_strided(samples, shape=(self.rowsPerFrame, self.nfft),
+                                                   strides=(stride * self.hop, stride), writeable=False)
+        spectrum = np.fft.fftshift(np.fft.fft(segments * self.window, axis=1), axes=1)
+        return 10 * np.log10(np.abs(spectrum) ** 2 + 1e-12).astype(np.float32)
+
+    def render(self, powerDb):
+        """Scale dB against the noise floor, color it and resize to the model's frame size (RGB uint8)."""
+        floor = np.median(powerDb)
+        scaled = np.clip((powerDb - floor) / self.dynamicRange, 0, 1)
+        gray = (scaled * 255).astype(np.uint8)
+        if self.frameSize:
+            gray = cv2.resize(gray, self.frameSize, interpolation=cv2.INTER_AREA)
+        colored = cv2.applyColorMap(gray, cv2.COLORMAP_PARULA)
+        return cv2.cvtColor(colored, cv2.COLOR_BGR2RGB)
+
+    def frame(self, index):
+        return self.render(self.powerDb(self.chunk(index)))
@@ -1,27 +1,43 @@
 # ServiceManager.py
 import CONSTANTS
-from DataRoutingEngine import DataRoutingEngine
+from DataRoutingEngine import DataRoutingEngine, MultiSourceRouter
+from SourceScheduler import parseSources
+from runModelOnImage import DEFAULT_MODEL_PATH
+from SignalTracker import SignalTracker
+from FrameScheduler import POLICIES
 from SimpleUI import MainWindow
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import pyqtSignal, QObject, QThread
+import argparse
 import time
 import sys
 
 class ServiceWorker(QObject):
-    # Update the signal to send three items: status, image identifier, and detection data.
-    updateImageSignal = pyqtSignal(str, object, object)
+    # Update the signal to send four items: status, frame path, detection data, and source name.
+    updateImageSignal = pyqtSignal(str, object, object, object)
+    # Per-source scheduler and queue counters, only sent when several feeds are routed.
+    countersSignal = pyqtSignal(object)
 
-    def __init__(self, imgDirectory):
+    def __init__(self, imgDirectory, policy = CONSTANTS.FRAME_POLICY, maxAge = CONSTANTS.FRAME_MAX_AGE):
         super().__init__()
         self.running = False
         self.paused = False
-        self.DataEngine = DataRoutingEngine(imgDirectory)
+        # A {name: (directory, weight)} mapping routes several feeds through one model.
+        if isinstance(imgDirectory, dict):
+            self.DataEngine = MultiSourceRouter(imgDirectory, policy = policy, maxAge = maxAge)
+        else:
+            self.DataEngine = DataRoutingEngine(imgDirectory, policy = policy, maxAge = maxAge)
+        # One tracker and frame counter per source, so tracks never match across feeds.
+        self.trackers = {}
+        self.sourceFrames = {}
             
     def run(self):
         try:
             self.running = True
             sentCount = 0
             self.DataEngine.reset()
+            self.trackers.clear()
+            self.sourceFrames.clear()
 
             while self.running:
                 if not self.paused:
@@ -39,9 +55,26 @@ class ServiceWorker(QObject):
 
                     # Unpack the result.
                     detectionData, annotated_filename = result
+
+                    source = getattr(self.DataEngine, "lastSource", None)
+                    tracker = self.trackers.setdefault(source, SignalTracker())
+                    self.sourceFrames[source] = self.sourceFrames.get(source, 0) + 1
+
+                    # Log only track births and deaths, not every frame.
+                    for event in tracker.update(detectionData, self.sourceFrames[source]):
+                        if event["event"] != "update":
+                            prefix = "" if source is None else "[" + source + "] "
+                            self.DataEngine.logEntry(f"{prefix}Track {event['id']} {event['event']}: {event['name']} "
+                                                     f"{event['lo']:.0f}-{event['hi']:.0f}")
                     
-                    # Emit the status text, annotated filename, and detection data.
-                    self.updateImageSignal.emit("Time: " + str(sentCount), annotated_filename, detectionData)
+                    # Emit the status text, the frame's path in its source folder, detection data and source.
+                    status = "Time: " + str(sentCount)
+                    if source is not None:
+                        status += " [" + source + "]"
+                    self.updateImageSignal.emit(status, self.DataEngine.framePath(annotated_filename),
+                                                detectionData, source)
+                    if isinstance(self.DataEngine, MultiSourceRouter):
+                        self.countersSignal.emit(self.DataEngine.counters())
                 
                 time.sleep(1)
 
@@ -75,20 +108,30 @@ class ServiceWorker(QObject):
 
 
 class ServiceManager:
-    def __init__(self, imgDirectory):
+    def __init__(self, imgDirectory, policy = CONSTANTS.FRAME_POLICY, maxAge = CONSTANTS.FRAME_MAX_AGE):
         self.app = QApplication(sys.argv)
         self.mainWindow = MainWindow(self.restart, self.stop, self.pause, self.resume)
         self.mainWindow.show()
 
-        self.worker = ServiceWorker(imgDirectory)
+        self.worker = ServiceWorker(imgDirectory, policy, maxAge)
         self.workerThread = QThread()
 
         self.worker.moveToThread(self.workerThread)
         self.workerThread.started.connect(self.worker.run)
         self.worker.updateImageSignal.connect(self.mainWindow.updateLabelAndImage)
+        self.worker.countersSignal.connect(self.mainWindow.showCounters)
 
         self.workerThread.start()
 
+        # Hot-swap the model whenever the weights file is replaced on disk.
+        self.worker.DataEngine.registry.watch(DEFAULT_MODEL_PATH)
+
+    def swapModel(self, modelPath):
+        return self.worker.DataEngine.registry.loadAsync(modelPath)
+
+    def rollbackModel(self):
+        return self.worker.DataEngine.registry.rollback()
+
     def pause(self):
         self.worker.pause()
 
@@ -102,6 +145,7 @@ class ServiceManager:
         self.workerThread.start()
 
     def stop(self):
+        self.worker.DataEngine.registry.stopWatching()
         self.worker.stop()
         self.workerThread.quit()
         self.workerThread.wait()
@@ -110,8 +154,17 @@ class ServiceManager:
 
 
 def main():
-    # The 'images' folder is used to load the list of files.
-    service = ServiceManager('images')
+    # The 'images' folder is used to load the list of files unless sources are
+    # given on the command line, e.g. rx1=images:2 rx2=/data/rx2
+    parser = argparse.ArgumentParser(description = "Classify spectrograms live in the Qt UI.")
+    parser.add_argument("sources", nargs = "*", help = "Feeds as name=directory[:weight]")
+    parser.add_argument("--policy", choices = sorted(POLICIES), default = CONSTANTS.FRAME_POLICY,
+                        help = "Order in which queued frames are served")
+    parser.add_argument("--max-age", type = float, default = CONSTANTS.FRAME_MAX_AGE,
+                        help = "Drop frames older than this many seconds")
+    args = parser.parse_args()
+    sources = parseSources(args.sources) if args.sources else 'images'
+    service = ServiceManager(sources, args.policy, args.max_age)
     sys.exit(service.app.exec())
 
 
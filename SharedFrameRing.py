@@ -0,0 +1,158 @@
+# SharedFrameRing.py
+import CONSTANTS
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+class SharedFrameRing:
+    """
+    Ring of preallocated frame slots in shared memory.
+
+    Pipeline stages pass slot indices between processes instead of pickled
+    frames, and read frames through NumPy views onto the shared buffer.
+    Each slot carries a reference count: acquire() hands out a free slot
+    with one reference, retain() adds holders when a frame fans out to
+    several consumers, and the slot is reused once every holder has called
+    release(). Pass the ring to child processes as a Process argument.
+    """
+    def __init__(self, slots=CONSTANTS.RING_SLOTS, frameShape=CONSTANTS.RING_FRAME_SHAPE, dtype=np.uint8, ctx=None):
+        ctx = ctx or mp.get_context()
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self.channels = frameShape[2] if len(frameShape) > 2 else 1
+        self.slotBytes = int(np.prod(frameShape)) * self.dtype.itemsize
+        self.frameMemory = shared_memory.SharedMemory(create=True, size=self.slotBytes * slots)
+        # Per slot: reference count, frame height, frame width
+        self.controlMemory = shared_memory.SharedMemory(create=True, size=slots * 3 * 8)
+        self.condition = ctx.Condition()
+        self.nextSlot = ctx.Value('i', 0, lock=False)
+        self.owner = True
+        self.control = np.ndarray((slots, 3), dtype=np.int64, buffer=self.controlMemory.buf)
+        self.control[:] = 0
+
+    def __getstate__(self):
+        return {
+            "slots": self.slots, "dtype": self.dtype.str, "channels": self.channels, "slotBytes": self.slotBytes,
+            "frameName": self.frameMemory.name, "controlName": self.controlMemory.name,
+            "condition": self.condition, "nextSlot": self.nextSlot
+        }
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.dtype = np.dtype(state["dtype"])
+        self.channels = state["channels"]
+        self.slotBytes = state["slotBytes"]
+        self.frameMemory = shared_memory.SharedMemory(name=state["frameName"])
+        self.controlMemory = shared_memory.SharedMemory(name=state["controlName"])
+        self.condition = state["condition"]
+        self.nextSlot = state["nextSlot"]
+        self.owner = False
+        self.control = np.ndarray((self.slots, 3), dtype=np.int64, buffer=self.controlMemory.buf)
+
+    def acquire(self, timeout=None):
+        """Claim a free slot (reference count 1); returns None if none frees up within timeout."""
+        with self.condition:
+            while True:
+                for offset in range(self.slots):
+                    slot = (self.nextSlot.value + offset) % self.slots
+                    if self.control[slot, 0] == 0:
+                        self.control[slot] = (1, 0, 0)
+                        self.nextSlot.value = (slot + 1) % self.slots
+                        return slot
+                if not self.condition.wait(timeout):
+                    return None
+
+    def reserve(self, slot, height, width):
+        """Writable view for a height x width frame in a slot, e.g. as a decode destination."""
+        if height * width * self.channels * self.dtype.itemsize > self.slotBytes:
+            raise ValueError(f"Frame {width}x{height} does not fit a ring slot of {self.slotBytes} bytes")
+        self.control[slot, 1:] = (height, width)
+        return self.view(slot)
+
+    def write(self, slot, frame):
+        """Copy a frame into a slot; the only copy a frame makes on its way through the pipeline."""
+        view = self.reserve(slot, frame.shape[0], frame.shape[1])
+        view[...] = frame.reshape(view.shape)
+        return view
+
+    def view(self, slot):
+        """Zero-copy NumPy view of the frame stored in a slot."""
+        height, width = (int(v) for v in self.control[slot, 1:])
+        shape = (height, width, self.channels) if self.channels > 1 else (height, width)
+        return np.ndarray(shape, dtype=self.dtype, buffer=self.frameMemory.buf, offset=slot * self.slotBytes)
+
+    def retain(self, slot, count=1):
+        with self.condition:
+            if self.control[slot, 0] <= 0:
+                raise ValueError(f"Slot {slot} is not held by anyone")
+            self.control[slot, 0] += count
+
+    def release(self, slot):
+        with self.condition:
+            if self.control[slot, 0] <= 0:
+                raise ValueError(f"Slot {slot} released more times than it was acquired")
+            self.control[slot, 0] -= 1
+            if self.control[slot, 0] == 0:
+                self.condition.notify_all()
+
+    def available(self):
+        with self.condition:
+            return int(np.count_nonzero(self.control[:, 0] == 0))
+
+    def close(self):
+        # Views must be dropped before the mapping can be closed.
+        self.control = None
+        self.frameMemory.close()
+        self.controlMemory.close()
+        if self.owner:
+            self.frameMemory.unlink()
+            self.controlMemory.unlink()
+
+
+def inferenceWorker(ring, slotQueue, resultQueue, modelPath=None, warmupFolder="images"):
+    """
+    Inference process: reads (slot, filename) items, classifies the frame in
+    place and forwards (slot, filename, detections). Ownership of the slot
+    moves on with the result; the renderer releases it. The model comes from
+    a watched registry, so detections carry its version and follow hot swaps.
+    A None item stops the worker.
+    """
+    from runModelOnImage import createRegistry, DEFAULT_MODEL_PATH
+    registry = createRegistry(modelPath or DEFAULT_MODEL_PATH, warmupFolder)
+    registry.watch(modelPath or DEFAULT_MODEL_PATH)
+    try:
+        while True:
+            item = slotQueue.get()
+            if item is None:
+                break
+            slot, filename = item
+            _, model = registry.current()
+            resultQueue.put((slot, filename, model.classifyArray(ring.view(slot))))
+    finally:
+        registry.stopWatching()
+
+
+def renderWorker(ring, resultQueue, outputFolder):
+    """
+    Render process: draws the detections of each (slot, filename, detections)
+    result, writes the annotated frame to outputFolder and releases the slot.
+    A None item stops the worker.
+    """
+    import os
+    import cv2
+    from FrameAnnotation import annotate_image
+    os.makedirs(outputFolder, exist_ok=True)
+    while True:
+        item = resultQueue.get()
+        if item is None:
+            break
+        slot, filename, detections = item
+        try:
+            # The only copy after decode: the annotated output, which must not be drawn into the shared slot.
+            image = cv2.cvtColor(ring.view(slot), cv2.COLOR_RGB2BGR)
+        finally:
+            ring.release(slot)
+        if len(detections) == 2 and detections[0] == CONSTANTS.FAILURE:
+            print(f"Error classifying {filename}: {detections[1]}")
+            continue
+        cv2.imwrite(os.path.join(outputFolder, filename), annotate_image(image, detections))
@@ -0,0 +1,308 @@
+# WorkBroker.py
+import CONSTANTS
+import argparse
+import collections
+import itertools
+import os
+import socket
+import threading
+import time
+from multiprocessing.managers import BaseManager
+from TunedConfig import loadTunedConfig
+from SignalGate import EnergyGate
+
+class WorkBroker:
+    """
+    Queue of classification work items shared by inference nodes.
+
+    Items are file references on storage every node can reach. A worker
+    leases a few items at a time and must acknowledge each one with
+    complete() or fail(); while it works it sends heartbeats. Leases that
+    pass their deadline without a heartbeat are treated as a lost worker
+    and the items go back on the queue, up to maxAttempts tries each.
+    A late result for an item that was already completed elsewhere is
+    ignored, so retries never produce duplicate results.
+
+    Used in-process as a local stand-in, or served over TCP with
+    serveBroker() so workers on other nodes connect with connectBroker().
+    """
+    def __init__(self, leaseSeconds=CONSTANTS.BROKER_LEASE_SECONDS, maxAttempts=CONSTANTS.BROKER_MAX_ATTEMPTS):
+        self.leaseSeconds = leaseSeconds
+        self.maxAttempts = maxAttempts
+        self.lock = threading.Lock()
+        self.ids = itertools.count()
+        self.queue = collections.deque()
+        self.items = {}    # id -> {"id", "path", "attempts", "options"}
+        self.leases = {}   # id -> (worker, deadline)
+        self.results = collections.deque()
+        self.nodes = {}
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "retried": 0, "duplicates": 0}
+
+    def node(self, worker):
+        now = time.time()
+        if worker not in self.nodes:
+            self.nodes[worker] = {"completed": 0, "failed": 0, "reclaimed": 0, "busySeconds": 0.0,
+                                  "firstSeen": now, "lastSeen": now, "lastCompleted": now}
+        self.nodes[worker]["lastSeen"] = now
+        return self.nodes[worker]
+
+    def submit(self, paths, options=None):
+        """
+        Queue file references; returns their item ids. `options` travel with
+        each item so every node classifies the job the same way
+        ({"tiled": bool, "gateThreshold": float}).
+        """
+        with self.lock:
+            ids = []
+            for path in paths:
+                itemId = next(self.ids)
+                self.items[itemId] = {"id": itemId, "path": path, "attempts": 0, "options": dict(options or {})}
+                self.queue.append(itemId)
+                ids.append(itemId)
+            self.stats["submitted"] += len(ids)
+            return ids
+
+    def lease(self, worker, maxItems=1):
+        """Hand up to maxItems queued items to a worker until its lease expires."""
+        with self.lock:
+            self.reclaimExpired()
+            self.node(worker)
+            deadline = time.time() + self.leaseSeconds
+            leased = []
+            while self.queue and len(leased) < maxItems:
+                item = self.items[self.queue.popleft()]
+                item["attempts"] += 1
+                self.leases[item["id"]] = (worker, deadline)
+                leased.append(dict(item))
+            return leased
+
+    def heartbeat(self, worker):
+        """Extend all of a worker's leases; returns how many it still holds."""
+        with self.lock:
+            self.node(worker)
+            deadline = time.time() + self.leaseSeconds
+            held = [itemId for itemId, (holder, _) in self.leases.items() if holder == worker]
+            for itemId in held:
+                self.leases[itemId] = (worker, deadline)
+            return len(held)
+
+    def complete(self, worker, itemId, detections, busySeconds=0.0, version=None, gated=False, tileStats=None):
+        """Acknowledge an item with its detections; False if it was already completed."""
+        with self.lock:
+            node = self.node(worker)
+            item = self.items.pop(itemId, None)
+            if item is None:
+                self.stats["duplicates"] += 1
+                return False
+            self.leases.pop(itemId, None)
+            try:
+                self.queue.remove(itemId)  # Reclaimed but not yet re-leased
+            except ValueError:
+                pass
+            node["completed"] += 1
+            node["busySeconds"] += busySeconds
+            node["lastCompleted"] = time.time()
+            self.stats["completed"] += 1
+            self.results.append({"id": itemId, "file": item["path"], "detections": detections,
+                                 "modelVersion": version, "gated": gated, "tileStats": tileStats, "worker": worker,
+                                 "attempts": item["attempts"], "error": None})
+            return True
+
+    def fail(self, worker, itemId, error):
+        """Report an item the worker could not classify; it is retried until maxAttempts."""
+        with self.lock:
+            self.node(worker)["failed"] += 1
+            if itemId in self.items and self.leases.get(itemId, (None,))[0] == worker:
+                del self.leases[itemId]
+                self.retryOrDrop(itemId, error)
+
+    def retryOrDrop(self, itemId, error):
+        item = self.items[itemId]
+        if item["attempts"] < self.maxAttempts:
+            self.queue.append(itemId)
+            self.stats["retried"] += 1
+            return
+        del self.items[itemId]
+        self.stats["failed"] += 1
+        self.results.append({"id": itemId, "file": item["path"], "detections": [], "modelVersion": None,
+                             "gated": False, "tileStats": None, "worker": None, "attempts": item["attempts"],
+                             "error": error})
+
+    def reclaimExpired(self):
+        # Caller holds the lock.
+        now = time.time()
+        for itemId, (worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[itemId]
+                self.nodes[worker]["reclaimed"] += 1
+                self.retryOrDrop(itemId, f"Worker {worker} stopped responding")
+
+    def collect(self, maxItems=None):
+        """Pop finished results (completed or given up on) for the caller to store."""
+        with self.lock:
+            self.reclaimExpired()
+            count = len(self.results) if maxItems is None else min(maxItems, len(self.results))
+            return [self.results.popleft() for _ in range(count)]
+
+    def outstanding(self):
+        """Items not yet completed or given up on."""
+        with self.lock:
+            return len(self.items)
+
+    def status(self):
+        with self.lock:
+            self.reclaimExpired()
+            now = time.time()
+            nodes = {}
+            for worker, node in self.nodes.items():
+                # Rate over the node's working span, so idle polling after the run does not dilute it.
+                elapsed = max(node["lastCompleted"] - node["firstSeen"], 1e-9)
+                nodes[worker] = dict(node,
+                                     itemsPerSecond=node["completed"] / elapsed if node["completed"] else 0.0,
+                                     idleSeconds=now - node["lastSeen"],
+                                     leased=sum(1 for holder, _ in self.leases.values() if holder == worker))
+            return dict(self.stats, queued=len(self.queue), leased=len(self.leases), nodes=nodes)
+
+
+class BrokerManager(BaseManager):
+    pass
+
+
+# Methods remote nodes may call; the rest expect the broker's lock to be held.
+EXPOSED = ("submit", "lease", "heartbeat", "complete", "fail", "collect", "outstanding", "status")
+
+
+def parseAddress(address, defaultPort=CONSTANTS.BROKER_PORT):
+    """(host, port) from "host:port", ":port" or "host"; without a host only this machine can connect."""
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port)) if port.isdigit() else (address or "127.0.0.1", defaultPort)
+
+
+def brokerKey():
+    """
+    Shared secret from SPECTROGRAM_BROKER_KEY. The broker speaks pickle, so
+    anyone holding the key can run code on the broker host; there is no
+    default and nothing starts without one.
+    """
+    key = os.environ.get("SPECTROGRAM_BROKER_KEY")
+    if not key:
+        raise RuntimeError("SPECTROGRAM_BROKER_KEY must be set to a shared secret before serving or joining a broker")
+    return key.encode()
+
+
+def serveBroker(broker, address=("127.0.0.1", CONSTANTS.BROKER_PORT), authkey=None):
+    """Serve a broker over TCP from a background thread; returns the server."""
+    BrokerManager.register("broker", callable=lambda: broker, exposed=EXPOSED)
+    server = BrokerManager(address=address, authkey=authkey or brokerKey()).get_server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def connectBroker(address, authkey=None):
+    """Proxy to a broker served on another node; exposes the same methods as WorkBroker."""
+    BrokerManager.register("broker", exposed=EXPOSED)
+    manager = BrokerManager(address=address, authkey=authkey or brokerKey())
+    manager.connect()
+    return manager.broker()
+
+
+def mapPath(path, pathMap):
+    """Rewrite a shared-storage prefix for this node, e.g. {"/mnt/archive": "/data/archive"}."""
+    for prefix, local in pathMap.items():
+        if path.startswith(prefix):
+            return local + path[len(prefix):]
+    return path
+
+
+def runWorker(broker, registry, name=None, batchSize=CONSTANTS.BATCH_SIZE, pathMap=None, stopEvent=None,
+              idleSleep=1.0, exitWhenIdle=False, heartbeatSeconds=CONSTANTS.BROKER_LEASE_SECONDS / 3):
+    """
+    Inference loop for one node: lease a batch, classify it in one forward
+    pass, acknowledge each item. A heartbeat thread keeps the leases alive
+    while the model runs, so only a node that dies loses its items. Tiling
+    and the energy gate follow the options each item was submitted with.
+    """
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    pathMap = pathMap or {}
+    stopEvent = stopEvent or threading.Event()
+    busy = threading.Event()
+    gates = {}  # threshold -> EnergyGate
+
+    def heartbeat():
+        while not stopEvent.wait(heartbeatSeconds):
+            if busy.is_set():
+                broker.heartbeat(name)
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        while not stopEvent.is_set():
+            items = broker.lease(name, batchSize)
+            if not items:
+                if exitWhenIdle and broker.outstanding() == 0:
+                    break
+                stopEvent.wait(idleSleep)
+                continue
+            busy.set()
+            options = items[0].get("options", {})
+            version, model = registry.current()
+            threshold = options.get("gateThreshold")
+            if threshold:
+                gate = gates.setdefault(threshold, EnergyGate(threshold))
+                passed = []
+                for item in items:
+                    if gate.passes(mapPath(item["path"], pathMap)):
+                        passed.append(item)
+                    else:
+                        broker.complete(name, item["id"], [], 0.0, version, True)
+                items = passed
+            if not items:
+                busy.clear()
+                continue
+            paths = [mapPath(item["path"], pathMap) for item in items]
+            start = time.perf_counter()
+            tileStats = [{} for _ in paths]
+            if options.get("tiled"):
+                results = [model.classifyTiled(path, stats=stats) for path, stats in zip(paths, tileStats)]
+            else:
+                results = model.classifyBatch(paths) if len(paths) > 1 else [model.classify(paths[0])]
+                if len(results) == 2 and results[0] == CONSTANTS.FAILURE:
+                    # Whole batch failed; find out which file is to blame.
+                    results = [model.classify(path) for path in paths]
+            perItem = (time.perf_counter() - start) / len(items)
+            for item, detections, stats in zip(items, results, tileStats):
+                if len(detections) == 2 and detections[0] == CONSTANTS.FAILURE:
+                    broker.fail(name, item["id"], detections[1])
+                else:
+                    broker.complete(name, item["id"], detections, perItem, version, False, stats or None)
+            busy.clear()
+    finally:
+        stopEvent.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference worker: pull spectrograms from a broker and classify them.")
+    parser.add_argument("broker", help="Broker address, host:port")
+    parser.add_argument("--name", help="Node name in the broker's stats (default host:pid)")
+    parser.add_argument("--batch-size", type=int, default=loadTunedConfig()["batchSize"])
+    parser.add_argument("--path-map", action="append", default=[],
+                        help="Rewrite a shared-storage prefix, e.g. /mnt/archive=/data/archive")
+    parser.add_argument("--model", help="Model weights (default Model/best.pt)")
+    parser.add_argument("--warmup-folder", default="images", help="Frames to warm the model up on")
+    args = parser.parse_args()
+
+    from runModelOnImage import createRegistry, DEFAULT_MODEL_PATH
+    registry = createRegistry(args.model or DEFAULT_MODEL_PATH, args.warmup_folder)
+    pathMap = dict(entry.split("=", 1) for entry in args.path_map)
+    try:
+        broker = connectBroker(parseAddress(args.broker))
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    print(f"Worker connected to {args.broker}")
+    try:
+        runWorker(broker, registry, args.name, args.batch_size, pathMap)
+    except KeyboardInterrupt:
+        print("\nWorker stopping; leased items will be retried elsewhere.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# autotune.py
+"""
+Find the fastest inference settings for this host and save them.
+
+Sweeps torch intra-op threads, batch size and the number of concurrent
+inference workers on a sample of my-react-app/images. Workers share one
+loaded model, the way BatchClassifier and local WorkBroker threads run.
+Each combination runs the sample `--repeat` times after a warm-up pass, and
+the tuner records throughput (frames/s) and p95 batch latency. A frame
+waits for its whole batch, so batch latency is the latency a frame sees.
+Combinations whose threads x workers exceed the core count are skipped
+unless --oversubscribe is given. The fastest combination within --max-p95-ms
+is written to tuned_config.json. modelAPI, DataRoutingEngine, WorkBroker
+and the Flask stream read that file at startup.
+
+    python autotune.py
+    python autotune.py --samples 48 --batch-sizes 1 4 8 16 --max-p95-ms 1500
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT_DIR, "my-react-app")
+IMAGES_DIR = os.path.join(APP_DIR, "images")
+sys.path.append(APP_DIR)
+
+from TunedConfig import DEFAULT_TUNED_CONFIG
+
+
+def powersOfTwo(limit):
+    values, value = [], 1
+    while value < limit:
+        values.append(value)
+        value *= 2
+    return values + [limit]
+
+
+def samplePaths(folder, count):
+    """Evenly spaced frames across the folder, so the sample is not one burst of similar frames."""
+    names = sorted((n for n in os.listdir(folder) if n.lower().endswith((".jpg", ".jpeg", ".png"))),
+                   key=lambda p: (len(p), p))
+    if not names:
+        raise SystemExit(f"No images found in {folder}")
+    step = max(1, len(names) // count)
+    return [os.path.join(folder, name) for name in names[::step][:count]]
+
+
+def runTrial(model, paths, batchSize, workers, repeat):
+    """Classify `paths` `repeat` times with `workers` concurrent batch streams; returns stats."""
+    batches = [paths[i:i + batchSize] for i in range(0, len(paths), batchSize)] * repeat
+    latencies = []
+
+    def classify(batch):
+        start = time.perf_counter()
+        model.classifyBatch(batch) if len(batch) > 1 else model.classify(batch[0])
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies.extend(pool.map(classify, batches))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "framesPerSecond": len(paths) * repeat / elapsed,
+        "p95Ms": latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))],
+        "medianMs": statistics.median(latencies)
+    }
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Sweep torch threads, batch size and workers; save the best.")
+    parser.add_argument("--samples", type=int, default=32, help="Frames from my-react-app/images to time")
+    parser.add_argument("--threads", type=int, nargs="*", default=powersOfTwo(cpus))
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--workers", type=int, nargs="*", default=powersOfTwo(cpus))
+    parser.add_argument("--repeat", type=int, default=2, help="Timed passes over the sample per combination")
+    parser.add_argument("--max-p95-ms", type=float, help="Only pick combinations with a p95 latency below this")
+    parser.add_argument("--oversubscribe", action="store_true", help="Also try threads x workers > core count")
+    parser.add_argument("--model", help="Model weights (default Model/best.pt)")
+    parser.add_argument("--output", default=DEFAULT_TUNED_CONFIG)
+    parser.add_argument("--dry-run", action="store_true", help="Print the result without writing it")
+    args = parser.parse_args()
+
+    import torch
+    from runModelOnImage import modelAPI, DEFAULT_MODEL_PATH
+
+    paths = samplePaths(IMAGES_DIR, args.samples)
+    model = modelAPI(args.model or DEFAULT_MODEL_PATH, threads=max(args.threads))
+    print(f"Tuning on {len(paths)} frames, {cpus} cores")
+    print(f"{'threads':>7} {'workers':>7} {'batch':>5} {'frames/s':>9} {'median ms':>10} {'p95 ms':>9}")
+
+    sweep = []
+    for threads in sorted(set(args.threads)):
+        torch.set_num_threads(threads)
+        # Warm-up at this thread count; the first passes pay for allocations and kernel selection.
+        runTrial(model, paths[:max(args.batch_sizes)], max(args.batch_sizes), 1, 1)
+        for workers in sorted(set(args.workers)):
+            if threads * workers > cpus and not args.oversubscribe:
+                continue
+            for batchSize in sorted(set(args.batch_sizes)):
+                stats = runTrial(model, paths, batchSize, workers, args.repeat)
+                row = dict(stats, torchThreads=threads, workers=workers, batchSize=batchSize)
+                sweep.append(row)
+                print(f"{threads:>7} {workers:>7} {batchSize:>5} {stats['framesPerSecond']:>9.2f} "
+                      f"{stats['medianMs']:>10.1f} {stats['p95Ms']:>9.1f}")
+
+    eligible = [row for row in sweep if args.max_p95_ms is None or row["p95Ms"] <= args.max_p95_ms]
+    if not eligible:
+        print(f"No combination met a p95 of {args.max_p95_ms} ms; nothing written.")
+        return 1
+    best = max(eligible, key=lambda row: (row["framesPerSecond"], -row["p95Ms"]))
+    config = {
+        "torchThreads": best["torchThreads"],
+        "batchSize": best["batchSize"],
+        "workers": best["workers"],
+        "framesPerSecond": best["framesPerSecond"],
+        "p95Ms": best["p95Ms"],
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": {"node": platform.node(), "platform": platform.platform(), "cpus": cpus,
+                 "torch": torch.__version__},
+        "sweep": sweep
+    }
+    print(f"Best: {best['torchThreads']} threads, {best['workers']} workers, batch {best['batchSize']} "
+          f"-> {best['framesPerSecond']:.2f} frames/s, p95 {best['p95Ms']:.1f} ms")
+    if args.dry_run:
+        return 0
+    with open(args.output, "w") as f:
+        json.dump(config, f, indent=2)
+    print(f"Tuned config written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+# build_dataset.py
+"""
+Build a YOLO training set from the Pascal VOC annotations.
+
+Parses and validates "1300 spectrograms/annotations" in parallel, resolving
+each image by file name in my-react-app/images (the <path> in the XMLs
+points at the original labelling machine and is ignored). Writes:
+
+    dataset/images/        links to the source JPEGs
+    dataset/labels/        one normalized YOLO label file per image
+    dataset/train.txt      image lists for a deterministic train/val split
+    dataset/val.txt
+    dataset/data.yaml      dataset config for yolov5 train.py
+    dataset/cache/images.u8   memory-mapped (N, size, size, 3) RGB uint8 letterboxed frames
+    dataset/cache/labels.npy  (M, 6) rows of image index, class, cx, cy, w, h in letterboxed coordinates
+    dataset/cache/index.json  file order, original sizes and letterbox scale/padding per frame
+    dataset/stats.json     class balance and validation issues
+
+The cache is read by DatasetCache.py, which serves the letterboxed frames and
+labels without decoding the JPEGs again.
+
+    python build_dataset.py
+    python build_dataset.py --size 416 --val-fraction 0.1 --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT_DIR, "my-react-app")
+sys.path.append(APP_DIR)
+
+import CONSTANTS
+
+IMAGES_DIR = os.path.join(APP_DIR, "images")
+ANNOTATIONS_DIR = os.path.join(ROOT_DIR, "1300 spectrograms", "annotations")
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, "dataset")
+PAD_VALUE = 114  # YOLOv5 letterbox gray
+workerCache = {}  # Per worker process: cache path -> open memmap
+
+
+def letterbox(image, size):
+    """Resize keeping aspect ratio and pad to size x size; returns (image, scale, (padX, padY))."""
+    h, w = image.shape[:2]
+    scale = min(size / w, size / h)
+    newW, newH = round(w * scale), round(h * scale)
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(image, (newW, newH), interpolation=interpolation)
+    padX, padY = (size - newW) // 2, (size - newH) // 2
+    boxed = np.full((size, size, 3), PAD_VALUE, dtype=np.uint8)
+    boxed[padY:padY + newH, padX:padX + newW] = resized
+    return boxed, scale, (padX, padY)
+
+
+def parseAnnotation(xmlPath, classIds, aliases):
+    """Boxes [(class id, xmin, ymin, xmax, ymax)] and the size recorded in a VOC file, plus issues found."""
+    issues = []
+    root = ET.parse(xmlPath).getroot()
+    filename = root.findtext("filename") or os.path.splitext(os.path.basename(xmlPath))[0] + ".jpg"
+    size = root.find("size")
+    recorded = (int(size.findtext("width", "0")), int(size.findtext("height", "0"))) if size is not None else (0, 0)
+    boxes = []
+    for obj in root.findall("object"):
+        name = obj.findtext("name", "").strip()
+        name = aliases.get(name, name)
+        if name not in classIds:
+            issues.append(f"unknown class {name!r}")
+            continue
+        box = obj.find("bndbox")
+        try:
+            xmin, ymin, xmax, ymax = (float(box.findtext(k)) for k in ("xmin", "ymin", "xmax", "ymax"))
+        except (AttributeError, TypeError, ValueError):
+            issues.append(f"{name} box has missing or non-numeric coordinates")
+            continue
+        boxes.append((classIds[name], xmin, ymin, xmax, ymax))
+    return filename, recorded, boxes, issues
+
+
+def processEntry(task):
+    """Worker: validate one annotation, write its YOLO label and its letterboxed frame into the cache slot."""
+    index, xmlPath, options = task
+    stem = os.path.splitext(os.path.basename(xmlPath))[0]
+    entry = {"index": index, "xml": os.path.basename(xmlPath), "valid": False, "issues": [], "labels": []}
+    try:
+        filename, recorded, boxes, issues = parseAnnotation(xmlPath, options["classIds"], options["aliases"])
+    except (ET.ParseError, OSError) as e:
+        entry["issues"].append(f"unreadable annotation: {e}")
+        return entry
+    entry["issues"].extend(issues)
+
+    imagePath = os.path.join(options["imagesDir"], filename)
+    if not os.path.exists(imagePath):
+        imagePath = os.path.join(options["imagesDir"], stem + ".jpg")
+    image = cv2.imread(imagePath)
+    if image is None:
+        entry["issues"].append(f"image {filename} missing or undecodable")
+        return entry
+    h, w = image.shape[:2]
+    if recorded != (w, h):
+        entry["issues"].append(f"recorded size {recorded[0]}x{recorded[1]} but image is {w}x{h}")
+
+    labels = []
+    for cls, xmin, ymin, xmax, ymax in boxes:
+        clipped = (max(0.0, xmin), max(0.0, ymin), min(float(w), xmax), min(float(h), ymax))
+        if clipped != (xmin, ymin, xmax, ymax):
+            entry["issues"].append(f"box {xmin:g},{ymin:g},{xmax:g},{ymax:g} clipped to the image")
+        xmin, ymin, xmax, ymax = clipped
+        if xmax - xmin < 1 or ymax - ymin < 1:
+            entry["issues"].append(f"degenerate box {xmin:g},{ymin:g},{xmax:g},{ymax:g} dropped")
+            continue
+        labels.append((cls, (xmin + xmax) / 2 / w, (ymin + ymax) / 2 / h, (xmax - xmin) / w, (ymax - ymin) / h))
+
+    with open(os.path.join(options["output"], "labels", stem + ".txt"), "w") as f:
+        f.writelines(f"{cls} {cx:.6f} {cy:.6f} {bw:.6f} {bh:.6f}\n" for cls, cx, cy, bw, bh in labels)
+
+    linkPath = os.path.join(options["output"], "images", os.path.basename(imagePath))
+    if not os.path.lexists(linkPath):
+        os.symlink(os.path.abspath(imagePath), linkPath)
+
+    size = options["size"]
+    if options["cachePath"] not in workerCache:
+        # Shared mapping: writes land in the file without an explicit flush per frame.
+        workerCache[options["cachePath"]] = np.memmap(options["cachePath"], dtype=np.uint8, mode="r+",
+                                                      shape=(options["count"], size, size, 3))
+    boxed, scale, (padX, padY) = letterbox(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), size)
+    workerCache[options["cachePath"]][index] = boxed
+
+    # Labels re-expressed in the letterboxed frame, so training can read the cache directly.
+    entry["labels"] = [(cls, (cx * w * scale + padX) / size, (cy * h * scale + padY) / size,
+                        bw * w * scale / size, bh * h * scale / size) for cls, cx, cy, bw, bh in labels]
+    entry.update(valid=True, image=os.path.basename(imagePath), width=w, height=h,
+                 scale=scale, pad=[padX, padY])
+    return entry
+
+
+def splitName(name, valFraction):
+    """Deterministic split by file name, so rebuilding never moves a frame between train and val."""
+    return "val" if zlib.crc32(name.encode()) % 10000 < valFraction * 10000 else "train"
+
+
+def classBalance(entries, classNames):
+    instances = {name: 0 for name in classNames}
+    images = {name: 0 for name in classNames}
+    for entry in entries:
+        seen = set()
+        for cls, *_ in entry["labels"]:
+            instances[classNames[cls]] += 1
+            seen.add(classNames[cls])
+        for name in seen:
+            images[name] += 1
+    total = sum(instances.values())
+    # Inverse-frequency weights normalized to mean 1, for a weighted sampler or loss.
+    weights = {name: (total / (len(classNames) * count) if count else 0.0) for name, count in instances.items()}
+    return {"instances": instances, "images": images, "classWeights": weights,
+            "background": sum(1 for entry in entries if not entry["labels"])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a YOLO dataset and image cache from the VOC annotations.")
+    parser.add_argument("--annotations", default=ANNOTATIONS_DIR)
+    parser.add_argument("--images", default=IMAGES_DIR)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--size", type=int, default=CONSTANTS.DATASET_IMAGE_SIZE, help="Letterboxed cache size")
+    parser.add_argument("--val-fraction", type=float, default=CONSTANTS.DATASET_VAL_FRACTION)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    classNames = list(CONSTANTS.DATASET_CLASSES)
+    xmlFiles = sorted((f for f in os.listdir(args.annotations) if f.endswith(".xml")),
+                      key=lambda p: (len(p), p))
+    for sub in ("labels", "images", "cache"):
+        os.makedirs(os.path.join(args.output, sub), exist_ok=True)
+    cachePath = os.path.join(args.output, "cache", "images.u8")
+    # Preallocate the cache; each worker fills its own slots in place.
+    np.memmap(cachePath, dtype=np.uint8, mode="w+", shape=(len(xmlFiles), args.size, args.size, 3)).flush()
+
+    options = {
+        "classIds": {name: i for i, name in enumerate(classNames)},
+        "aliases": CONSTANTS.DATASET_CLASS_ALIASES,
+        "imagesDir": args.images,
+        "output": args.output,
+        "cachePath": cachePath,
+        "size": args.size,
+        "count": len(xmlFiles)
+    }
+    tasks = [(i, os.path.join(args.annotations, f), options) for i, f in enumerate(xmlFiles)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        entries = list(pool.map(processEntry, tasks, chunksize=16))
+    elapsed = time.perf_counter() - start
+    valid = [entry for entry in entries if entry["valid"]]
+    print(f"Processed {len(entries)} annotations in {elapsed:.1f}s "
+          f"({len(entries) / max(elapsed, 1e-9):.0f}/s with {args.workers} workers); {len(valid)} usable")
+
+    splits = {"train": [], "val": []}
+    for entry in valid:
+        splits[splitName(entry["image"], args.val_fraction)].append(
+            os.path.join(os.path.abspath(args.output), "images", entry["image"]))
+    for split, paths in splits.items():
+        with open(os.path.join(args.output, f"{split}.txt"), "w") as f:
+            f.writelines(path + "\n" for path in paths)
+    with open(os.path.join(args.output, "data.yaml"), "w") as f:
+        f.write(f"path: {os.path.abspath(args.output)}\ntrain: train.txt\nval: val.txt\n"
+                f"nc: {len(classNames)}\nnames: {json.dumps(classNames)}\n"
+                f"# Letterboxed frames and labels: cache/ (read with DatasetCache.py)\n")
+
+    labels = np.array([(entry["index"], *label) for entry in valid for label in entry["labels"]],
+                      dtype=np.float32).reshape(-1, 6)
+    np.save(os.path.join(args.output, "cache", "labels.npy"), labels)
+    with open(os.path.join(args.output, "cache", "index.json"), "w") as f:
+        json.dump({"shape": [len(entries), args.size, args.size, 3], "dtype": "uint8", "channels": "RGB",
+                   "classes": classNames,
+                   "frames": [{k: entry.get(k) for k in ("index", "image", "valid", "width", "height", "scale", "pad")}
+                              for entry in entries]}, f)
+
+    issues = {entry["xml"]: entry["issues"] for entry in entries if entry["issues"]}
+    stats = {
+        "annotations": len(entries),
+        "usable": len(valid),
+        "train": len(splits["train"]),
+        "val": len(splits["val"]),
+        "balance": classBalance(valid, classNames),
+        "valBalance": classBalance([e for e in valid if splitName(e["image"], args.val_fraction) == "val"],
+                                   classNames),
+        "issues": issues
+    }
+    with open(os.path.join(args.output, "stats.json"), "w") as f:
+        json.dump(stats, f, indent=2)
+
+    print(f"{'class':>6} {'boxes':>6} {'images':>6} {'weight':>6}")
+    for name in classNames:
+        print(f"{name:>6} {stats['balance']['instances'][name]:>6} {stats['balance']['images'][name]:>6} "
+              f"{stats['balance']['classWeights'][name]:>6.2f}")
+    print(f"{len(issues)} annotation(s) with issues; details in {os.path.join(args.output, 'stats.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# evaluate_gate.py
+"""
+Measure what the pre-filter gate would cost in recall on the labelled dataset.
+
+Scores every spectrogram in my-react-app/images that has a Pascal VOC file in
+"1300 spectrograms/annotations", then, for a sweep of thresholds, reports the
+share of frames the full model would still run on and the share of labelled
+frames (overall and per class) the gate would wrongly skip. Frames without
+signals can be added with --negatives to see the skip rate the gate buys.
+
+    python evaluate_gate.py
+    python evaluate_gate.py --thresholds 2 2.5 3 3.5 4 --negatives /data/quiet_frames
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT_DIR, "my-react-app")
+sys.path.append(APP_DIR)
+
+from SignalGate import EnergyGate
+
+IMAGES_DIR = os.path.join(APP_DIR, "images")
+ANNOTATIONS_DIR = os.path.join(ROOT_DIR, "1300 spectrograms", "annotations")
+DEFAULT_THRESHOLDS = [1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 5.0, 6.0]
+
+
+def labelledClasses(xmlPath):
+    root = ET.parse(xmlPath).getroot()
+    return {obj.findtext("name", "Unknown") for obj in root.findall("object")}
+
+
+def scoreFolder(gate, folder, labels=None, limit=0):
+    """Gate scores for the frames in folder (labelled ones only when labels is given), at most limit of them."""
+    candidates = []
+    for filename in sorted(os.listdir(folder), key=lambda p: (len(p), p)):
+        path = os.path.join(folder, filename)
+        if not os.path.isfile(path):
+            continue
+        classes = set()
+        if labels is not None:
+            xmlPath = os.path.join(labels, os.path.splitext(filename)[0] + ".xml")
+            if not os.path.exists(xmlPath):
+                continue
+            classes = labelledClasses(xmlPath)
+        candidates.append((filename, path, classes))
+        if limit and len(candidates) >= limit:
+            break
+    frames = []
+    for filename, path, classes in candidates:
+        try:
+            frames.append({"file": filename, "score": gate.score(path), "classes": classes})
+        except Exception as e:
+            print(f"Error scoring {path}: {e}")
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the recall cost of the signal gate.")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--negatives", help="Folder of frames known to contain no signals")
+    parser.add_argument("--limit", type=int, default=0, help="Only score the first N labelled frames")
+    parser.add_argument("--output", help="Write the sweep as JSON")
+    args = parser.parse_args()
+
+    gate = EnergyGate()
+    start = time.perf_counter()
+    positives = scoreFolder(gate, IMAGES_DIR, ANNOTATIONS_DIR, args.limit)
+    elapsed = time.perf_counter() - start
+    negatives = scoreFolder(gate, args.negatives) if args.negatives else []
+    print(f"Scored {len(positives)} labelled frames at {elapsed / max(1, len(positives)) * 1000:.2f} ms/frame")
+    if not negatives:
+        print("No --negatives given: every frame is labelled, so run rate equals recall. "
+              "Pass a folder of signal-free frames to measure the skip rate the gate buys.")
+
+    classes = sorted({name for frame in positives for name in frame["classes"]})
+    header = f"{'threshold':>9} {'run rate':>9} {'recall':>7} " + " ".join(f"{c:>7}" for c in classes)
+    if negatives:
+        header += f" {'neg skip':>9}"
+    print(header)
+
+    sweep = []
+    for threshold in sorted(args.thresholds):
+        kept = [frame for frame in positives if frame["score"] >= threshold]
+        row = {
+            "threshold": threshold,
+            "runRate": len(kept) / len(positives) if positives else None,
+            "recall": len(kept) / len(positives) if positives else None,
+            "classRecall": {},
+            "missed": [frame["file"] for frame in positives if frame["score"] < threshold][:20]
+        }
+        for name in classes:
+            withClass = [frame for frame in positives if name in frame["classes"]]
+            row["classRecall"][name] = sum(frame["score"] >= threshold for frame in withClass) / len(withClass)
+        if negatives:
+            skipped = sum(frame["score"] < threshold for frame in negatives)
+            row["negativeSkipRate"] = skipped / len(negatives)
+            total = len(positives) + len(negatives)
+            row["runRate"] = (len(kept) + len(negatives) - skipped) / total
+        sweep.append(row)
+
+        line = f"{threshold:>9.2f} {row['runRate']:>9.3f} {row['recall']:>7.3f} "
+        line += " ".join(f"{row['classRecall'][c]:>7.3f}" for c in classes)
+        if negatives:
+            line += f" {row['negativeSkipRate']:>9.3f}"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"frames": len(positives), "negatives": len(negatives), "sweep": sweep}, f, indent=2)
+        print(f"Sweep written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
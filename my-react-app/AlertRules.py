@@ -0,0 +1,221 @@
+# AlertRules.py
+import CONSTANTS
+import abc
+import collections
+import json
+import operator
+import os
+import threading
+import time
+
+COMPARISONS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+def frameMetrics(bands, width, detections):
+    """Per-frame values rules can watch: occupancy per class and "All", plus the detection count."""
+    metrics = dict(bands.occupancy(width))
+    metrics.setdefault("All", 0.0)
+    metrics["detections"] = len(detections)
+    return metrics
+
+
+class ConsecutiveRule(abc.ABC):
+    """
+    Fires once a per-frame condition has held for `frames` consecutive
+    frames, and resolves on the first frame it does not hold.
+    Only a streak counter is kept, so each frame costs O(1).
+    """
+    def __init__(self, name, frames=1, severity="warning"):
+        self.name = name
+        self.frames = frames
+        self.severity = severity
+        self.streak = 0
+        self.firing = False
+
+    @abc.abstractmethod
+    def holds(self, bands, metrics):
+        """Whether the condition holds for this frame."""
+
+    def update(self, bands, metrics, timestamp):
+        """Returns ("firing" | "resolved", value) on a state change, else None."""
+        if self.holds(bands, metrics):
+            self.streak += 1
+            if not self.firing and self.streak >= self.frames:
+                self.firing = True
+                return "firing", self.streak
+        else:
+            self.streak = 0
+            if self.firing:
+                self.firing = False
+                return "resolved", 0
+        return None
+
+
+class OverlapRule(ConsecutiveRule):
+    """Two classes overlapping in frequency, e.g. Radar on top of 5G."""
+    def __init__(self, name, classes, frames=1, severity="warning"):
+        super().__init__(name, frames, severity)
+        self.classA, self.classB = classes
+
+    def holds(self, bands, metrics):
+        return bool(bands.overlapping(self.classA, self.classB))
+
+    def describe(self):
+        return f"{self.classA} overlaps {self.classB} for {self.frames} consecutive frame(s)"
+
+
+class ThresholdRule(ConsecutiveRule):
+    """A frame metric past a threshold, e.g. more than 5 detections in one frame."""
+    def __init__(self, name, metric, threshold, op=">", frames=1, severity="warning"):
+        super().__init__(name, frames, severity)
+        self.metric = metric
+        self.threshold = threshold
+        self.op = op
+        self.compare = COMPARISONS[op]
+
+    def holds(self, bands, metrics):
+        return self.compare(metrics.get(self.metric, 0), self.threshold)
+
+    def describe(self):
+        return f"{self.metric} {self.op} {self.threshold} for {self.frames} consecutive frame(s)"
+
+
+class RollingMeanRule:
+    """
+    Fires when the mean of a metric over the last `seconds` passes a
+    threshold. The window is a deque of (time, value) with a running sum:
+    each frame adds one sample and drops the expired ones, so the cost per
+    frame is O(1) amortized instead of a rescan of the history.
+    """
+    def __init__(self, name, metric, threshold, seconds, op=">", minSamples=1, severity="warning"):
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.seconds = seconds
+        self.op = op
+        self.compare = COMPARISONS[op]
+        self.minSamples = minSamples
+        self.severity = severity
+        self.window = collections.deque()
+        self.total = 0.0
+        self.firing = False
+
+    def update(self, bands, metrics, timestamp):
+        value = float(metrics.get(self.metric, 0))
+        self.window.append((timestamp, value))
+        self.total += value
+        while self.window and self.window[0][0] <= timestamp - self.seconds:
+            self.total -= self.window.popleft()[1]
+        mean = self.total / len(self.window)
+        active = len(self.window) >= self.minSamples and self.compare(mean, self.threshold)
+        if active != self.firing:
+            self.firing = active
+            return ("firing" if active else "resolved"), mean
+        return None
+
+    def describe(self):
+        return f"{self.metric} rolling mean {self.op} {self.threshold} over {self.seconds:g}s"
+
+
+RULE_TYPES = {"overlap": OverlapRule, "threshold": ThresholdRule, "rollingMean": RollingMeanRule}
+
+
+def buildRule(spec):
+    """Rule instance from a spec such as {"name": ..., "type": "overlap", "classes": ["Radar", "5G"], "frames": 3}."""
+    spec = dict(spec)
+    ruleType = spec.pop("type")
+    if ruleType not in RULE_TYPES:
+        raise ValueError(f"Unknown rule type {ruleType}; expected one of {list(RULE_TYPES)}")
+    return RULE_TYPES[ruleType](**spec)
+
+
+def loadRuleSpecs(path=None):
+    """Rule specs from a JSON file (a list of specs), falling back to CONSTANTS.ALERT_RULES."""
+    if path:
+        with open(path) as f:
+            return json.load(f)
+    return CONSTANTS.ALERT_RULES
+
+
+class AlertStore:
+    """Append-only JSON Lines log of alert events, with the most recent ones kept in memory."""
+    def __init__(self, path, keep=CONSTANTS.ALERTS_KEPT):
+        self.path = path
+        self.lock = threading.Lock()
+        self.recentEvents = collections.deque(maxlen=keep)
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self.recentEvents.append(json.loads(line))
+                    except ValueError:
+                        continue
+
+    def append(self, events):
+        with self.lock:
+            with open(self.path, "a") as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+            self.recentEvents.extend(events)
+
+    def recent(self, limit=None, source=None):
+        with self.lock:
+            events = [e for e in self.recentEvents if source is None or e["source"] == source]
+        return events[-limit:] if limit else events
+
+
+class AlertEngine:
+    """
+    Evaluates alert rules against each frame as it is processed. Every
+    source gets its own rule instances, so streaks and rolling windows
+    never mix feeds. Only state changes (firing, resolved) become events.
+    """
+    def __init__(self, specs=None, store=None):
+        self.specs = list(specs if specs is not None else loadRuleSpecs())
+        for spec in self.specs:
+            buildRule(spec)  # Fail at startup, not on the first frame
+        self.store = store
+        self.rules = {}
+        self.lock = threading.Lock()
+
+    def rulesFor(self, source):
+        if source not in self.rules:
+            self.rules[source] = [buildRule(spec) for spec in self.specs]
+        return self.rules[source]
+
+    def evaluate(self, source, bands, metrics, frame, timestamp=None):
+        """Feed one frame; returns (and persists) the alert events it caused."""
+        timestamp = time.time() if timestamp is None else timestamp
+        events = []
+        with self.lock:
+            for rule in self.rulesFor(source):
+                change = rule.update(bands, metrics, timestamp)
+                if change is None:
+                    continue
+                state, value = change
+                events.append({
+                    "rule": rule.name,
+                    "state": state,
+                    "severity": rule.severity,
+                    "message": rule.describe(),
+                    "value": value,
+                    "source": source,
+                    "frame": frame,
+                    "time": timestamp
+                })
+        if events and self.store is not None:
+            self.store.append(events)
+        return events
+
+    def isFiring(self, source, name):
+        """Whether the named rule is currently firing for a source; False if no such rule is configured."""
+        with self.lock:
+            return any(rule.firing for rule in self.rules.get(source, []) if rule.name == name)
+
+    def active(self):
+        with self.lock:
+            return [{"rule": rule.name, "source": source, "severity": rule.severity, "message": rule.describe()}
+                    for source, rules in self.rules.items() for rule in rules if rule.firing]
+
+    def reset(self):
+        with self.lock:
+            self.rules.clear()
@@ -0,0 +1,132 @@
+# BandProcessor.py
+import CONSTANTS
+
+##############################################
+# Interval Tree
+##############################################
+class IntervalTree:
+    """
+    Static centered interval tree over closed intervals (lo, hi, payload).
+    Built once per frame; overlap queries run in O(log n + k).
+    """
+    def __init__(self, intervals):
+        self.center = None
+        self.left = None
+        self.right = None
+        self.byLo = []
+        self.byHi = []
+        if not intervals:
+            return
+
+        endpoints = sorted(p for lo, hi, _ in intervals for p in (lo, hi))
+        self.center = endpoints[len(endpoints) // 2]
+
+        leftIntervals, rightIntervals, here = [], [], []
+        for interval in intervals:
+            if interval[1] < self.center:
+                leftIntervals.append(interval)
+            elif interval[0] > self.center:
+                rightIntervals.append(interval)
+            else:
+                here.append(interval)
+
+        self.byLo = sorted(here, key=lambda i: i[0])
+        self.byHi = sorted(here, key=lambda i: i[1], reverse=True)
+        if leftIntervals:
+            self.left = IntervalTree(leftIntervals)
+        if rightIntervals:
+            self.right = IntervalTree(rightIntervals)
+
+    def query(self, lo, hi):
+        """Return the payloads of every interval overlapping [lo, hi]."""
+        found = []
+        node = self
+        while node is not None and node.center is not None:
+            if hi < node.center:
+                for interval in node.byLo:
+                    if interval[0] > hi:
+                        break
+                    found.append(interval[2])
+                node = node.left
+            elif lo > node.center:
+                for interval in node.byHi:
+                    if interval[1] < lo:
+                        break
+                    found.append(interval[2])
+                node = node.right
+            else:
+                # [lo, hi] contains the center, so every interval stored here overlaps it.
+                found.extend(interval[2] for interval in node.byLo)
+                if node.left is not None:
+                    found.extend(node.left.query(lo, hi))
+                node = node.right
+        return found
+
+
+##############################################
+# Band Collapsing
+##############################################
+def collapseDetections(detections, gapTolerance=CONSTANTS.BAND_GAP_TOLERANCE):
+    """
+    Collapse detection boxes into per-class frequency (x-axis) intervals.
+    Fragments of the same class that overlap or sit within gapTolerance
+    pixels of each other are merged into a single band.
+    """
+    byClass = {}
+    for det in detections:
+        try:
+            lo, hi = sorted((float(det["xmin"]), float(det["xmax"])))
+            byClass.setdefault(det.get("name", "Unknown"), []).append((lo, hi, float(det.get("confidence", 1.0))))
+        except Exception as e:
+            print(f"Error collapsing detection {det}: {e}")
+
+    bands = {}
+    for name, spans in byClass.items():
+        spans.sort()
+        merged = []
+        for lo, hi, confidence in spans:
+            if merged and lo <= merged[-1]["hi"] + gapTolerance:
+                band = merged[-1]
+                band["hi"] = max(band["hi"], hi)
+                band["confidence"] = max(band["confidence"], confidence)
+                band["count"] += 1
+            else:
+                merged.append({"name": name, "lo": lo, "hi": hi, "confidence": confidence, "count": 1})
+        bands[name] = merged
+    return bands
+
+
+class FrameBands:
+    """Per-frame frequency bands with an interval tree for overlap queries."""
+
+    def __init__(self, detections, gapTolerance=CONSTANTS.BAND_GAP_TOLERANCE):
+        self.bands = collapseDetections(detections, gapTolerance)
+        self.tree = IntervalTree([(band["lo"], band["hi"], band)
+                                  for classBands in self.bands.values() for band in classBands])
+
+    def intervals(self, name=None):
+        if name is not None:
+            return self.bands.get(name, [])
+        return [band for classBands in self.bands.values() for band in classBands]
+
+    def query(self, lo, hi, name=None):
+        """Bands overlapping the frequency range [lo, hi], optionally of one class."""
+        return [band for band in self.tree.query(lo, hi) if name is None or band["name"] == name]
+
+    def overlapping(self, nameA, nameB):
+        """Pairs of (A, B) bands that overlap in frequency, e.g. overlapping("5G", "Radar")."""
+        return [(band, other) for band in self.bands.get(nameA, [])
+                for other in self.query(band["lo"], band["hi"], nameB)]
+
+    def occupancy(self, width):
+        """Fraction of the frequency axis covered by each class (and by all bands)."""
+        ratios = {name: sum(b["hi"] - b["lo"] for b in classBands) / width if width > 0 else 0
+                  for name, classBands in self.bands.items()}
+        covered = collapseDetections([{"name": "All", "xmin": b["lo"], "xmax": b["hi"]}
+                                      for b in self.intervals()], 0).get("All", [])
+        ratios["All"] = sum(b["hi"] - b["lo"] for b in covered) / width if width > 0 else 0
+        return ratios
+
+    def toDict(self):
+        return {name: [{k: band[k] for k in ("lo", "hi", "confidence", "count")} for band in classBands]
+                for name, classBands in self.bands.items()}
@@ -9,3 +9,101 @@ COLORS = {
 }
 BUTTON_DEFAULT = """font-size: 20px;
                     padding: 10px 20px;"""
+
+# Tiled inference for spectrograms wider/taller than the model input
+TILE_SIZE = 640
+TILE_OVERLAP = 0.25
+TILE_NMS_IOU = 0.5
+TILE_EDGE_MARGIN = 2
+TILE_FRAGMENT_OVERLAP = 0.5  # Intersection over the smaller box at which a seam fragment joins another box
+
+# Band post-processing: max gap (pixels) between same-class fragments merged into one band
+BAND_GAP_TOLERANCE = 3
+
+# Temporal tracking of bands across frames
+TRACK_IOU_THRESHOLD = 0.3
+TRACK_MAX_MISSES = 2
+TRACK_CONFIDENCE_SMOOTHING = 0.3
+TRACK_MOVE_TOLERANCE = 5
+
+# Multi-source routing
+DEFAULT_SOURCE_WEIGHT = 1.0
+HISTORY_LENGTH = 10
+
+# Model registry / hot swap
+MODEL_VERSIONS_KEPT = 2
+MODEL_WARMUP_FRAMES = 3
+MODEL_WATCH_INTERVAL = 5
+
+# Seconds between streamed frames
+FRAME_INTERVAL = 2
+
+# Shared-memory frame ring: slot count and largest frame a slot holds (height, width, channels)
+RING_SLOTS = 16
+RING_FRAME_SHAPE = (1080, 1920, 3)
+
+# Routing queue priorities: "newest" keeps operators on current conditions under backlog; FRAME_MAX_AGE
+# (seconds, None for no deadline) drops frames that are too old to matter. Both can be set per run on the CLI.
+FRAME_POLICY = "newest"
+FRAME_MAX_AGE = None
+FRAME_BOOST_WINDOW = 30          # seconds around a high-interference frame whose neighbours are boosted
+FRAME_BOOST_FLAGS_KEPT = 8
+FRAME_DROPPED_KEPT = 100
+HIGH_INTERFERENCE_RATIO = 0.5    # share of the band occupied that counts as high interference
+SOURCE_BOOST_FACTOR = 4.0
+SOURCE_BOOST_SECONDS = 60
+
+# Pre-filter gate before full inference; 0 disables it. Tune with evaluate_gate.py
+# (on the labelled set, 2.0 kept 99.9% of annotated frames and 3.0 kept 99.0%).
+GATE_THRESHOLD = 0
+GATE_COLUMNS = 128
+
+# Raw IQ ingest: FFT size, STFT rows per frame, output frame (width, height), dB span above the noise floor
+IQ_NFFT = 1024
+IQ_ROWS_PER_FRAME = 535
+IQ_FRAME_SIZE = (690, 535)
+IQ_DYNAMIC_RANGE_DB = 30.0
+
+# Image tiers streamed to dashboards: name -> (max width in pixels or None for full size, JPEG quality)
+IMAGE_TIERS = {
+    "thumbnail": (240, 60),
+    "preview": (640, 75),
+    "full": (None, 90)
+}
+DEFAULT_IMAGE_TIER = "preview"
+RECENT_FRAMES_KEPT = 30
+
+# Headless batch classification
+BATCH_SIZE = 8
+BATCH_WORKERS = 2
+BATCH_PROGRESS_INTERVAL = 5
+
+# Multi-node work distribution (WorkBroker.py); the shared key must be set in SPECTROGRAM_BROKER_KEY
+BROKER_PORT = 5055
+BROKER_LEASE_SECONDS = 30
+BROKER_MAX_ATTEMPTS = 3
+
+# Alert rules evaluated on every frame (AlertRules.py); SPECTROGRAM_ALERT_RULES can point to a JSON list instead.
+# Overlap and threshold rules fire after `frames` consecutive frames, so "more than 3" is frames 4.
+ALERT_RULES = [
+    {"name": "radar-on-5g", "type": "overlap", "classes": ["Radar", "5G"], "frames": 4, "severity": "critical"},
+    {"name": "lte-occupancy", "type": "rollingMean", "metric": "LTE", "threshold": 0.4, "seconds": 60, "minSamples": 5},
+    {"name": "crowded-frame", "type": "threshold", "metric": "detections", "threshold": 5},
+    {"name": "high-interference", "type": "threshold", "metric": "All", "threshold": HIGH_INTERFERENCE_RATIO, "op": ">="}
+]
+# Rules the streams act on besides alerting: the backend's warning flag, and saving frames to high_interference/
+CROWDED_FRAME_RULE = "crowded-frame"
+HIGH_INTERFERENCE_RULE = "high-interference"
+ALERTS_KEPT = 200
+
+# Training dataset build (build_dataset.py): class order of the YOLO labels, VOC names renamed on import
+DATASET_CLASSES = ["5G", "LTE", "Radar", "JSSS"]
+DATASET_CLASS_ALIASES = {"DSSS": "JSSS"}
+DATASET_IMAGE_SIZE = 640
+DATASET_VAL_FRACTION = 0.15
+
+# History browser in the Qt UI: thumbnail (width, height), LRU cache entries, queued decodes, rows added per scroll batch
+HISTORY_THUMBNAIL_SIZE = (160, 124)
+HISTORY_CACHE_SIZE = 400
+HISTORY_PENDING_MAX = 64
+HISTORY_FETCH_BATCH = 256
@@ -0,0 +1,85 @@
+# FrameAnnotation.py
+import cv2
+import xml.etree.ElementTree as ET
+
+def parse_annotation(xml_path):
+    """Parse XML annotation (Pascal VOC format) and return a list of detections."""
+    detections = []
+    try:
+        tree = ET.parse(xml_path)
+        root = tree.getroot()
+        for obj in root.findall("object"):
+            name = obj.find("name").text if obj.find("name") is not None else "Unknown"
+            bndbox = obj.find("bndbox")
+            if bndbox is not None:
+                xmin = float(bndbox.find("xmin").text)
+                ymin = float(bndbox.find("ymin").text)
+                xmax = float(bndbox.find("xmax").text)
+                ymax = float(bndbox.find("ymax").text)
+                detections.append({
+                    "xmin": xmin,
+                    "ymin": ymin,
+                    "xmax": xmax,
+                    "ymax": ymax,
+                    "name": name,
+                    "confidence": 1.0
+                })
+        print(f"[DEBUG] Parsed {len(detections)} detections from {xml_path}")
+    except Exception as e:
+        print(f"Error parsing XML {xml_path}: {e}")
+    return detections
+
+def annotate_image(image, detections):
+    """Draw bounding boxes and labels on the image."""
+    h, w = image.shape[:2]
+    def get_color(label):
+        colors = {
+            "5g": (0, 0, 255),      # Neon Red
+            "lte": (255, 0, 255),    # Neon Magenta
+            "radar": (0, 255, 0),    # Neon Green
+            "jsss": (255, 165, 0)    # Neon Orange
+        }
+        return colors.get(label.lower(), (255, 255, 255))
+    for det in detections:
+        try:
+            x1, y1, x2, y2 = map(int, [det["xmin"], det["ymin"], det["xmax"], det["ymax"]])
+            label = det["name"]
+            confidence = float(det["confidence"])
+            box_color = get_color(label)
+            text = f"{label} {confidence:.2f}"
+            cv2.rectangle(image, (x1, y1), (x2, y2), box_color, 3)
+            font_scale = 0.8
+            text_thickness = 2
+            text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_thickness)[0]
+            text_x = x1
+            text_y = y1 - 10 if y1 - 10 > text_size[1] else y1 + text_size[1] + 10
+            cv2.rectangle(image, (text_x, text_y - text_size[1] - 5),
+                          (text_x + text_size[0], text_y), (0, 0, 0), -1)
+            cv2.putText(image, text, (text_x, text_y - 3),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), text_thickness)
+        except Exception as e:
+            print(f"Error annotating detection {det}: {e}")
+    return image
+
+def compute_graph_data(detections, img_width, img_height):
+    """Compute the ratio of each bounding box's area to the image area for each signal type."""
+    ratios = {"5G": 0, "LTE": 0, "Radar": 0, "JSSS": 0, "All": 0}
+    img_area = img_width * img_height
+    for det in detections:
+        try:
+            x1, y1, x2, y2 = map(float, [det["xmin"], det["ymin"], det["xmax"], det["ymax"]])
+            bbox_area = max(0, x2 - x1) * max(0, y2 - y1)
+            ratio = bbox_area / img_area if img_area > 0 else 0
+            name = det["name"].lower()
+            if name == "5g":
+                ratios["5G"] += ratio
+            elif name == "lte":
+                ratios["LTE"] += ratio
+            elif name == "radar":
+                ratios["Radar"] += ratio
+            elif name == "jsss":
+                ratios["JSSS"] += ratio
+            ratios["All"] += ratio
+        except Exception as e:
+            print(f"Error computing ratio for detection {det}: {e}")
+    return ratios
@@ -0,0 +1,253 @@
+# HistoryBrowser.py
+import CONSTANTS
+import os
+import threading
+from collections import OrderedDict, deque
+import cv2
+from PyQt6.QtCore import Qt, QSize, QAbstractListModel, QModelIndex, QThread, QFileSystemWatcher, pyqtSignal
+from PyQt6.QtGui import QPixmap, QImage, QColor
+from PyQt6.QtWidgets import QWidget, QListView, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QAbstractItemView
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+##############################################
+# Bounded LRU Pixmap Cache
+##############################################
+class PixmapCache:
+    """Least-recently-used thumbnails; memory stays bounded however long the history gets."""
+    def __init__(self, capacity=CONSTANTS.HISTORY_CACHE_SIZE):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key):
+        pixmap = self.items.get(key)
+        if pixmap is not None:
+            self.items.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        self.items[key] = pixmap
+        self.items.move_to_end(key)
+        while len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
+
+##############################################
+# Background Thumbnail Decoder
+##############################################
+class ThumbnailLoader(QThread):
+    """
+    Decodes thumbnails off the GUI thread. Requests are served newest
+    first, because the newest request is what is on screen now, and the
+    queue is bounded, so a fast scroll drops frames that are no longer
+    visible instead of decoding all of them. Results arrive as QImages;
+    pixmaps are made on the GUI thread.
+    """
+    thumbnailReady = pyqtSignal(str, QImage)
+
+    def __init__(self, size=CONSTANTS.HISTORY_THUMBNAIL_SIZE, maxPending=CONSTANTS.HISTORY_PENDING_MAX):
+        super().__init__()
+        self.size = size
+        self.requests = deque(maxlen=maxPending)
+        self.condition = threading.Condition()
+        self.running = True
+
+    def request(self, path):
+        with self.condition:
+            if path in self.requests:
+                self.requests.remove(path)
+            self.requests.append(path)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.requests:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                path = self.requests.pop()
+            image = self.decode(path)
+            if image is not None:
+                self.thumbnailReady.emit(path, image)
+
+    def decode(self, path):
+        # Reduced decode: libjpeg scales while decoding, so only a quarter of the pixels are produced.
+        frame = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_4)
+        if frame is None:
+            print(f"Error decoding thumbnail {path}")
+            return None
+        h, w = frame.shape[:2]
+        scale = min(self.size[0] / w, self.size[1] / h)
+        frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w = frame.shape[:2]
+        # copy() detaches the QImage from the NumPy buffer before it crosses threads.
+        return QImage(frame.data, w, h, 3 * w, QImage.Format.Format_RGB888).copy()
+
+##############################################
+# Virtualized History Model
+##############################################
+class HistoryModel(QAbstractListModel):
+    """
+    Newest-first list of saved frames. Only file names are held; rows are
+    exposed to the view in batches as it scrolls, and a thumbnail is
+    decoded only when the view asks for a visible row.
+    """
+    def __init__(self, folder, loader, cache, fetchBatch=CONSTANTS.HISTORY_FETCH_BATCH):
+        super().__init__()
+        self.folder = folder
+        self.loader = loader
+        self.cache = cache
+        self.fetchBatch = fetchBatch
+        self.files = []    # newest first
+        self.arrival = {}  # name -> arrival order; files are only ever prepended, so row = len - 1 - arrival
+        self.shown = 0     # rows exposed to the view so far
+        self.placeholder = QPixmap(*CONSTANTS.HISTORY_THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor("#2b2b2b"))
+        self.loader.thumbnailReady.connect(self.onThumbnail)
+        self.refresh()
+
+    def scan(self):
+        try:
+            entries = [(entry.stat().st_mtime, entry.name) for entry in os.scandir(self.folder)
+                       if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.name not in self.arrival]
+        except OSError as e:
+            print(f"Error reading history folder {self.folder}: {e}")
+            return []
+        return [name for _, name in sorted(entries, reverse=True)]
+
+    def refresh(self):
+        """Pick up frames saved since the last scan; they go in at the top."""
+        newFiles = self.scan()
+        if not newFiles:
+            return
+        for name in reversed(newFiles):
+            self.arrival[name] = len(self.arrival)
+        if self.shown:
+            self.beginInsertRows(QModelIndex(), 0, len(newFiles) - 1)
+            self.files[:0] = newFiles
+            self.shown += len(newFiles)
+            self.endInsertRows()
+        else:
+            self.beginResetModel()
+            self.files = newFiles + self.files
+            self.shown = min(len(self.files), self.fetchBatch)
+            self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.shown
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.shown < len(self.files)
+
+    def fetchMore(self, parent):
+        count = min(self.fetchBatch, len(self.files) - self.shown)
+        self.beginInsertRows(QModelIndex(), self.shown, self.shown + count - 1)
+        self.shown += count
+        self.endInsertRows()
+
+    def path(self, row):
+        return os.path.join(self.folder, self.files[row])
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self.shown:
+            return None
+        name = self.files[index.row()]
+        if role == Qt.ItemDataRole.DecorationRole:
+            path = self.path(index.row())
+            pixmap = self.cache.get(path)
+            if pixmap is None:
+                self.loader.request(path)
+                return self.placeholder
+            return pixmap
+        if role == Qt.ItemDataRole.DisplayRole:
+            # high_interference_..._YYYYmmdd_HHMMSS.jpg -> "HH:MM:SS"
+            stamp = os.path.splitext(name)[0].rsplit("_", 1)[-1]
+            return f"{stamp[:2]}:{stamp[2:4]}:{stamp[4:6]}" if len(stamp) == 6 and stamp.isdigit() else name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return name
+        return None
+
+    def onThumbnail(self, path, image):
+        self.cache.put(path, QPixmap.fromImage(image))
+        arrival = self.arrival.get(os.path.basename(path))
+        if arrival is None or len(self.files) - 1 - arrival >= self.shown:
+            return
+        index = self.index(len(self.files) - 1 - arrival)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+##############################################
+# History Panel
+##############################################
+class HistoryPanel(QWidget):
+    """Scrollable timeline of saved high-interference frames; emits the full-frame path on selection."""
+    frameSelected = pyqtSignal(str)
+    liveRequested = pyqtSignal()
+
+    def __init__(self, folder):
+        super().__init__()
+        self.cache = PixmapCache()
+        self.loader = ThumbnailLoader()
+        self.model = HistoryModel(folder, self.loader, self.cache)
+
+        self.view = QListView()
+        self.view.setViewMode(QListView.ViewMode.IconMode)
+        self.view.setFlow(QListView.Flow.LeftToRight)
+        self.view.setWrapping(False)
+        self.view.setMovement(QListView.Movement.Static)
+        self.view.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        # Uniform sizes let the view lay out rows without asking the model for each one.
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.view.setIconSize(QSize(*CONSTANTS.HISTORY_THUMBNAIL_SIZE))
+        self.view.setGridSize(QSize(CONSTANTS.HISTORY_THUMBNAIL_SIZE[0] + 16, CONSTANTS.HISTORY_THUMBNAIL_SIZE[1] + 30))
+        self.view.setFixedHeight(CONSTANTS.HISTORY_THUMBNAIL_SIZE[1] + 50)
+        self.view.setModel(self.model)
+        self.view.selectionModel().currentChanged.connect(self.onCurrentChanged)
+
+        self.titleLabel = QLabel()
+        self.liveButton = QPushButton("Back to live")
+        self.liveButton.clicked.connect(self.onLive)
+        header = QHBoxLayout()
+        header.addWidget(self.titleLabel)
+        header.addStretch()
+        header.addWidget(self.liveButton)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(header)
+        layout.addWidget(self.view)
+
+        # New frames saved by the service appear without a rescan of the whole folder.
+        self.watcher = QFileSystemWatcher([folder]) if os.path.isdir(folder) else QFileSystemWatcher()
+        self.watcher.directoryChanged.connect(self.refresh)
+        self.updateTitle()
+        self.loader.start()
+
+    def refresh(self):
+        self.model.refresh()
+        self.updateTitle()
+
+    def updateTitle(self):
+        self.titleLabel.setText(f"High interference history ({len(self.model.files)} frames)")
+
+    def onCurrentChanged(self, current, previous):
+        if current.isValid():
+            self.frameSelected.emit(self.model.path(current.row()))
+
+    def onLive(self):
+        self.view.clearSelection()
+        self.view.setCurrentIndex(QModelIndex())
+        self.liveRequested.emit()
+
+    def shutdown(self):
+        self.loader.stop()
@@ -0,0 +1,157 @@
+# ModelRegistry.py
+import CONSTANTS
+import os
+import threading
+import time
+from collections import OrderedDict
+
+def modelVersion(path):
+    """Version tag for a weights file: its name plus modification time."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(os.path.getmtime(path)))
+    except OSError:
+        return name
+    return f"{name}-{stamp}"
+
+def warmupFrames(folder, count=CONSTANTS.MODEL_WARMUP_FRAMES):
+    """First few spectrograms of a folder, used to warm a freshly loaded model."""
+    try:
+        names = sorted(os.listdir(folder), key=lambda p: (len(p), p))
+    except OSError:
+        return []
+    paths = [os.path.join(folder, name) for name in names]
+    return [p for p in paths if os.path.isfile(p)][:count]
+
+
+class ModelRegistry:
+    """
+    Holds loaded model versions and the one currently serving inference.
+    New weights are loaded and warmed on a background thread, then swapped
+    in atomically, so the stream never stops; older versions stay loaded
+    for rollback.
+
+    loader: path -> model object
+    warmup: model -> None, run on a new model before it goes live
+    """
+    def __init__(self, loader, warmup=None, keep=CONSTANTS.MODEL_VERSIONS_KEPT):
+        self.loader = loader
+        self.warmup = warmup
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.versions = OrderedDict()  # version -> {"model", "path", "loadedAt"}
+        self.history = []  # activation order, newest last
+        self.loading = None
+        self.lastError = None
+        self.watcher = None
+
+    def load(self, path, version=None, activate=True):
+        """Load, warm and (optionally) activate weights; blocks until done."""
+        version = version or modelVersion(path)
+        print(f"Loading model version {version} from {path}...")
+        model = self.loader(path)
+        model.version = version
+        if self.warmup is not None:
+            start = time.perf_counter()
+            self.warmup(model)
+            print(f"Warmed up {version} in {time.perf_counter() - start:.2f}s")
+        with self.lock:
+            self.versions[version] = {"model": model, "path": path, "loadedAt": time.time()}
+            if activate:
+                self.activateLocked(version)
+        return version
+
+    def loadAsync(self, path, version=None, activate=True):
+        """Start loading weights in the background; returns False if a load is already running."""
+        with self.lock:
+            if self.loading is not None:
+                return False
+            self.loading = path
+
+        def task():
+            try:
+                self.load(path, version, activate)
+                self.lastError = None
+            except Exception as e:
+                self.lastError = f"Error loading model {path}: {e}"
+                print(self.lastError)
+            finally:
+                with self.lock:
+                    self.loading = None
+
+        threading.Thread(target=task, daemon=True).start()
+        return True
+
+    def current(self):
+        """Return (version, model) of the active model as one consistent pair."""
+        with self.lock:
+            if not self.history:
+                return None, None
+            version = self.history[-1]
+            return version, self.versions[version]["model"]
+
+    def activate(self, version):
+        with self.lock:
+            if version not in self.versions:
+                raise KeyError(f"Unknown model version {version}")
+            self.activateLocked(version)
+
+    def rollback(self):
+        """Switch back to the previously active version; returns it, or None if there is none."""
+        with self.lock:
+            if len(self.history) < 2:
+                return None
+            self.history.pop()
+            return self.history[-1]
+
+    def activateLocked(self, version):
+        if version in self.history:
+            self.history.remove(version)
+        self.history.append(version)
+        # Free the oldest versions that are neither active nor rollback targets.
+        while len(self.versions) > self.keep:
+            stale = next((v for v in self.versions if v not in self.history[-self.keep:]), None)
+            if stale is None:
+                break
+            del self.versions[stale]
+            if stale in self.history:
+                self.history.remove(stale)
+
+    def watch(self, path, interval=CONSTANTS.MODEL_WATCH_INTERVAL):
+        """
+        Poll a weights file and hot-load it whenever it changes on disk.
+        A change is loaded once the mtime has held for one interval, so a file
+        still being copied is not picked up half-written; a change seen while
+        another load runs is retried on the next poll rather than lost.
+        """
+        def task():
+            lastSeen = os.path.getmtime(path) if os.path.exists(path) else None
+            pending = None
+            while self.watcher is not None:
+                time.sleep(interval)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                if mtime == lastSeen:
+                    pending = None
+                elif mtime != pending:
+                    pending = mtime  # Still changing; wait for it to settle
+                elif self.loadAsync(path):
+                    lastSeen, pending = mtime, None
+
+        self.watcher = threading.Thread(target=task, daemon=True)
+        self.watcher.start()
+
+    def stopWatching(self):
+        self.watcher = None
+
+    def status(self):
+        with self.lock:
+            return {
+                "active": self.history[-1] if self.history else None,
+                "versions": [{"version": v, "path": info["path"], "loadedAt": info["loadedAt"]}
+                             for v, info in self.versions.items()],
+                "loading": self.loading,
+                "lastError": self.lastError
+            }
@@ -0,0 +1,62 @@
+# SignalGate.py
+import CONSTANTS
+import threading
+import cv2
+import numpy as np
+
+class EnergyGate:
+    """
+    Cheap "any signal present?" check run before the full model.
+
+    The frame is decoded at quarter resolution, and each pixel's energy is
+    approximated by how far the colormap has moved from green/blue towards
+    yellow (red minus blue). Averaging over time gives a power profile per
+    frequency column. The score is how far the strongest columns rise above
+    the quietest third of the band, in units of that third's spread.
+    Frames scoring below the threshold skip inference; a threshold of 0
+    disables the gate.
+    """
+    def __init__(self, threshold=CONSTANTS.GATE_THRESHOLD, columns=CONSTANTS.GATE_COLUMNS):
+        self.threshold = threshold
+        self.columns = columns
+        self.lock = threading.Lock()
+        self.stats = {"frames": 0, "passed": 0, "skipped": 0}
+
+    def score(self, filePath):
+        image = cv2.imread(filePath, cv2.IMREAD_REDUCED_COLOR_4)
+        if image is None:
+            raise ValueError(f"Could not read {filePath}")
+        energy = image[..., 2].astype(np.float32) - image[..., 0].astype(np.float32)
+        profile = cv2.resize(energy, (self.columns, energy.shape[0]), interpolation=cv2.INTER_AREA).mean(axis=0)
+        profile.sort()
+        quiet = profile[:max(2, self.columns // 3)]
+        # Second-highest column, so a single hot column of JPEG noise cannot open the gate.
+        return float((profile[-2] - np.median(quiet)) / (quiet.std() + 1.0))
+
+    def passes(self, filePath):
+        """True if the frame should go on to the full model."""
+        if self.threshold <= 0:
+            passed = True
+        else:
+            try:
+                passed = self.score(filePath) >= self.threshold
+            except Exception as e:
+                # When in doubt, let the full model decide.
+                print(f"Error scoring {filePath} in signal gate: {e}")
+                passed = True
+        with self.lock:
+            self.stats["frames"] += 1
+            self.stats["passed" if passed else "skipped"] += 1
+        return passed
+
+    def rates(self):
+        with self.lock:
+            frames = self.stats["frames"]
+            return dict(self.stats,
+                        threshold=self.threshold,
+                        passRate=self.stats["passed"] / frames if frames else None,
+                        skipRate=self.stats["skipped"] / frames if frames else None)
+
+    def reset(self):
+        with self.lock:
+            self.stats = {"frames": 0, "passed": 0, "skipped": 0}
@@ -0,0 +1,104 @@
+# SignalTracker.py
+import CONSTANTS
+import itertools
+import time
+from BandProcessor import collapseDetections
+
+def intervalIoU(a, b):
+    """IoU of two frequency intervals given as dicts with lo/hi."""
+    intersection = min(a["hi"], b["hi"]) - max(a["lo"], b["lo"])
+    if intersection <= 0:
+        return 0.0
+    union = max(a["hi"], b["hi"]) - min(a["lo"], b["lo"])
+    return intersection / union if union > 0 else 0.0
+
+
+class SignalTracker:
+    """
+    Associates per-frame frequency bands with persistent tracks so a signal
+    that stays on air is reported once, not once per frame.
+    update() returns only births, material updates and deaths.
+    """
+    def __init__(self, iouThreshold=CONSTANTS.TRACK_IOU_THRESHOLD,
+                 maxMisses=CONSTANTS.TRACK_MAX_MISSES,
+                 smoothing=CONSTANTS.TRACK_CONFIDENCE_SMOOTHING,
+                 moveTolerance=CONSTANTS.TRACK_MOVE_TOLERANCE):
+        self.iouThreshold = iouThreshold
+        self.maxMisses = maxMisses
+        self.smoothing = smoothing
+        self.moveTolerance = moveTolerance
+        self.tracks = {}
+        self.nextId = itertools.count(1)
+
+    def reset(self):
+        self.tracks.clear()
+        self.nextId = itertools.count(1)
+
+    def update(self, detections, frame, timestamp=None):
+        """Feed one frame of detections; returns the list of track events it caused."""
+        timestamp = time.time() if timestamp is None else timestamp
+        bands = collapseDetections(detections)
+        events = []
+        matched = set()
+
+        for name, classBands in bands.items():
+            candidates = [t for t in self.tracks.values() if t["name"] == name]
+            pairs = sorted(((intervalIoU(track, band), track["id"], i)
+                            for track in candidates for i, band in enumerate(classBands)), reverse=True)
+            usedBands = set()
+            for iou, trackId, i in pairs:
+                if iou < self.iouThreshold:
+                    break
+                if trackId in matched or i in usedBands:
+                    continue
+                matched.add(trackId)
+                usedBands.add(i)
+                if self.applyBand(self.tracks[trackId], classBands[i], frame, timestamp):
+                    events.append(self.event("update", self.tracks[trackId]))
+
+            for i, band in enumerate(classBands):
+                if i in usedBands:
+                    continue
+                track = {
+                    "id": next(self.nextId),
+                    "name": name,
+                    "lo": band["lo"],
+                    "hi": band["hi"],
+                    "confidence": band["confidence"],
+                    "startFrame": frame,
+                    "endFrame": frame,
+                    "startTime": timestamp,
+                    "endTime": timestamp,
+                    "misses": 0
+                }
+                self.tracks[track["id"]] = track
+                matched.add(track["id"])
+                events.append(self.event("birth", track))
+
+        for trackId in list(self.tracks):
+            if trackId in matched:
+                continue
+            track = self.tracks[trackId]
+            track["misses"] += 1
+            if track["misses"] > self.maxMisses:
+                events.append(self.event("death", self.tracks.pop(trackId)))
+        return events
+
+    def applyBand(self, track, band, frame, timestamp):
+        """Fold a matched band into a track; True if the change is worth reporting."""
+        moved = (abs(track["lo"] - band["lo"]) > self.moveTolerance or
+                 abs(track["hi"] - band["hi"]) > self.moveTolerance)
+        track["lo"], track["hi"] = band["lo"], band["hi"]
+        track["confidence"] += self.smoothing * (band["confidence"] - track["confidence"])
+        track["endFrame"] = frame
+        track["endTime"] = timestamp
+        track["misses"] = 0
+        return moved
+
+    def event(self, kind, track):
+        payload = {k: v for k, v in track.items() if k != "misses"}
+        payload["event"] = kind
+        return payload
+
+    def activeTracks(self):
+        return [self.event("active", track) for track in self.tracks.values()]
@@ -10,8 +10,11 @@ from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QPixmap, QImage, QFont
 from PyQt6.QtWidgets import (
     QMainWindow, QApplication, QPushButton, QLabel,
-    QVBoxLayout, QHBoxLayout, QWidget, QSizePolicy, QSplitter
+    QVBoxLayout, QHBoxLayout, QWidget, QSizePolicy, QSplitter, QComboBox
 )
+from HistoryBrowser import HistoryPanel
+
+HIGH_INTERFERENCE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "high_interference")
 
 ##############################################
 # CustomButton Definition
@@ -131,13 +134,15 @@ def annotate_image(image, detections):
 # MainWindow Class Definition
 ##############################################
 class MainWindow(QMainWindow):
-    def __init__(self, restart, stop, pause, resume):
+    def __init__(self, restart, stop, pause, resume, historyFolder=HIGH_INTERFERENCE_FOLDER):
         super().__init__()
         self.restart = restart
         self.stop = stop
         self.pause = pause
         self.resume = resume
         self.paused = False
+        # While a history frame is shown, live updates leave the image alone.
+        self.reviewing = False
 
         self.setWindowTitle("RTX 5G Interference Detector")
 
@@ -159,7 +164,15 @@ class MainWindow(QMainWindow):
         self.pauseButton = CustomButton(self.togglePause, "Pause")
         self.pauseButton.setColors("#919180", "#ffffff")
         self.buttonLayout.addWidget(self.pauseButton)
+
+        # Feed whose scores the graph shows; filled in as sources report, hidden for a single feed.
+        self.sourceSelector = QComboBox()
+        self.sourceSelector.setVisible(False)
+        self.sourceSelector.currentTextChanged.connect(self.plotSource)
+        self.buttonLayout.addWidget(self.sourceSelector)
         self.mainLayout.addLayout(self.buttonLayout)
+        # Latest signal scores per source, so one feed's frames never replace another's graph.
+        self.sourceScores = {}
 
         # --- Splitter Layout for Spectrogram and Graph ---
         self.dataLayout = QSplitter(Qt.Orientation.Horizontal)
@@ -183,6 +196,12 @@ class MainWindow(QMainWindow):
 
         self.mainLayout.addWidget(self.dataLayout)
 
+        # --- History Timeline ---
+        self.historyPanel = HistoryPanel(historyFolder)
+        self.historyPanel.frameSelected.connect(self.showHistoryFrame)
+        self.historyPanel.liveRequested.connect(self.returnToLive)
+        self.mainLayout.addWidget(self.historyPanel)
+
         # --- Status Label ---
         self.updatingLabel = QLabel()
         font = QFont()
@@ -190,6 +209,11 @@ class MainWindow(QMainWindow):
         self.updatingLabel.setFont(font)
         self.mainLayout.addWidget(self.updatingLabel)
 
+        # --- Router Counters ---
+        self.countersLabel = QLabel()
+        self.countersLabel.setVisible(False)
+        self.mainLayout.addWidget(self.countersLabel)
+
         # Initially, load a default annotation.
         # (Make sure "loading.xml" exists in your annotation folder or change the filename accordingly.)
         self.updateLabelAndImage("Loading...", "loading.xml", [])
@@ -208,7 +232,38 @@ class MainWindow(QMainWindow):
             self.pause()  # Call the pause callback.
         self.paused = not self.paused
 
-    def updateLabelAndImage(self, newLabel, newAnnotationFile, detectionData):
+    def showHistoryFrame(self, path):
+        """Load a saved frame at full resolution; only happens when it is selected in the timeline."""
+        image = cv2.imread(path)
+        if image is None:
+            print(f"❌ Error: Failed to load history frame {path}")
+            return
+        self.reviewing = True
+        self.showImage(image)
+        self.updatingLabel.setText("History: " + os.path.basename(path))
+
+    def returnToLive(self):
+        self.reviewing = False
+        self.updatingLabel.setText("Live")
+
+    def showImage(self, image):
+        try:
+            height, width, channel = image.shape
+            bytesPerLine = 3 * width
+            qtImage = QImage(image.data, width, height, bytesPerLine, QImage.Format.Format_BGR888)
+            pixmap = QPixmap.fromImage(qtImage)
+            self.imageLabel.setPixmap(pixmap.scaled(
+                self.imageLabel.size(),
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation))
+        except Exception as e:
+            print(f"❌ Error updating spectrogram: {e}")
+
+    def closeEvent(self, event):
+        self.historyPanel.shutdown()
+        super().closeEvent(event)
+
+    def updateLabelAndImage(self, newLabel, newAnnotationFile, detectionData, source=None):
   
         if isinstance(newAnnotationFile, str) and newAnnotationFile.lower().endswith('.xml'):
             annotated_folder = "/Users/spoorthikoppula/Desktop/Raytheon/1300 spectrograms"
@@ -233,8 +288,9 @@ class MainWindow(QMainWindow):
             newImage = annotate_image(newImage, detections)
             graph_detections = detections  # Use parsed detections for the graph.
         else:
+            # ServiceWorker sends the frame's path in its source folder; a bare name is from the default feed.
             image_folder = "/Users/spoorthikoppula/Desktop/Raytheon/images"
-            image_path = os.path.join(image_folder, newAnnotationFile)
+            image_path = os.path.join(image_folder, newAnnotationFile)  # Unchanged when already a path
             print(f"🔍 Loading image from: {image_path}")
             if not os.path.exists(image_path):
                 print(f"❌ File does not exist: {image_path}")
@@ -247,19 +303,9 @@ class MainWindow(QMainWindow):
             newImage = annotate_image(newImage, detectionData)
             graph_detections = detectionData
 
-        try:
-            height, width, channel = newImage.shape
-            bytesPerLine = 3 * width
-            qtImage = QImage(newImage.data, width, height, bytesPerLine, QImage.Format.Format_BGR888)
-            pixmap = QPixmap.fromImage(qtImage)
-            self.imageLabel.setPixmap(pixmap.scaled(
-                self.imageLabel.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation))
-        except Exception as e:
-            print(f"❌ Error updating spectrogram: {e}")
-
-        self.updatingLabel.setText(newLabel)
+        if not self.reviewing:
+            self.showImage(newImage)
+            self.updatingLabel.setText(newLabel)
 
         # --- Update the Graph ---
         signal_scores = {}
@@ -268,6 +314,22 @@ class MainWindow(QMainWindow):
             confidence = float(det.get("confidence", 0))
             signal_scores[name] = signal_scores.get(name, 0) + confidence
 
+        self.sourceScores[source] = signal_scores
+        if source is None:
+            self.plotScores(signal_scores)
+        elif self.sourceSelector.findText(source) < 0:
+            # The first source to report becomes the selection and is drawn by plotSource.
+            self.sourceSelector.addItem(source)
+            self.sourceSelector.setVisible(True)
+        elif source == self.sourceSelector.currentText():
+            self.plotScores(signal_scores)
+
+    def plotSource(self, source):
+        """Redraw the graph from the stored scores of the selected source."""
+        if source:
+            self.plotScores(self.sourceScores.get(source, {}))
+
+    def plotScores(self, signal_scores):
         self.plotWidget.clear()
         if signal_scores:
             names = list(signal_scores.keys())
@@ -278,3 +340,13 @@ class MainWindow(QMainWindow):
             ax.setTicks([list(zip(x, names))])
         else:
             self.plotWidget.plot()
+
+    def showCounters(self, counters):
+        """Show MultiSourceRouter.counters(): per-source scheduling results and queue drops."""
+        parts = []
+        for name, counts in sorted(counters.items()):
+            queue = counts.get("queue", {})
+            parts.append(f"{name}: {counts['classified']}/{counts['scheduled']} classified, "
+                         f"{counts['failed']} failed, {queue.get('dropped', 0)} dropped")
+        self.countersLabel.setText("   ".join(parts))
+        self.countersLabel.setVisible(bool(parts))
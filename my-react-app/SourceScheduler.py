@@ -0,0 +1,83 @@
+# SourceScheduler.py
+import CONSTANTS
+import os
+import time
+
+def parseSources(spec, defaultWeight=CONSTANTS.DEFAULT_SOURCE_WEIGHT):
+    """
+    Parse a source list such as "rx1=images:2,rx2=/data/rx2" into
+    {name: (directory, weight)}. A bare directory is named after its basename.
+    """
+    sources = {}
+    for entry in spec.split(",") if isinstance(spec, str) else spec:
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, rest = entry.rpartition("=")
+        directory, weight = rest, defaultWeight
+        head, sep, tail = rest.rpartition(":")
+        if sep and tail.replace(".", "", 1).isdigit():
+            directory, weight = head, float(tail)
+        name = name or os.path.basename(os.path.normpath(directory))
+        sources[name] = (directory, weight)
+    return sources
+
+
+class WeightedFairScheduler:
+    """
+    Weighted fair queueing across sources by virtual finish time.
+    A source with weight 2 is served twice as often as one with weight 1,
+    and an idle source cannot bank credit while it has nothing to send.
+    """
+    def __init__(self, weights=None):
+        self.weights = {}
+        self.boosts = {}  # source -> (factor, expiry time)
+        self.finish = {}
+        self.counters = {}
+        self.virtualTime = 0.0
+        for source, weight in (weights or {}).items():
+            self.add(source, weight)
+
+    def add(self, source, weight=CONSTANTS.DEFAULT_SOURCE_WEIGHT):
+        if weight <= 0:
+            raise ValueError(f"Source {source} needs a positive weight, got {weight}")
+        self.weights[source] = weight
+        self.finish[source] = self.virtualTime
+        self.counters.setdefault(source, {"scheduled": 0, "classified": 0, "failed": 0})
+
+    def remove(self, source):
+        self.weights.pop(source, None)
+        self.boosts.pop(source, None)
+        self.finish.pop(source, None)
+
+    def next(self, ready=None):
+        """Pick the next source to serve; `ready` optionally limits the choice to sources with work."""
+        candidates = [s for s in self.weights if ready is None or s in ready]
+        if not candidates:
+            return None
+        source = min(candidates, key=lambda s: (max(self.finish[s], self.virtualTime), s))
+        start = max(self.finish[source], self.virtualTime)
+        self.virtualTime = start
+        self.finish[source] = start + 1.0 / self.effectiveWeight(source)
+        self.counters[source]["scheduled"] += 1
+        return source
+
+    def boost(self, source, factor=CONSTANTS.SOURCE_BOOST_FACTOR, seconds=CONSTANTS.SOURCE_BOOST_SECONDS):
+        """Temporarily multiply a source's weight, e.g. after it reports high interference."""
+        self.boosts[source] = (factor, time.time() + seconds)
+
+    def effectiveWeight(self, source):
+        factor, expiry = self.boosts.get(source, (1.0, 0))
+        if expiry and time.time() > expiry:
+            del self.boosts[source]
+            factor = 1.0
+        return self.weights[source] * factor
+
+    def record(self, source, success):
+        self.counters[source]["classified" if success else "failed"] += 1
+
+    def reset(self):
+        self.virtualTime = 0.0
+        for source in self.weights:
+            self.finish[source] = 0.0
+            self.counters[source] = {"scheduled": 0, "classified": 0, "failed": 0}
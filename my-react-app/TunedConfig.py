@@ -0,0 +1,34 @@
+# TunedConfig.py
+import CONSTANTS
+import json
+import os
+
+# Host-specific settings written by autotune.py at the repository root.
+DEFAULT_TUNED_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tuned_config.json")
+
+def loadTunedConfig(path=None):
+    """
+    Tuned inference settings for this host: torch intra-op threads, batch
+    size and concurrent inference workers. Falls back to the CONSTANTS
+    defaults (and torch's own thread count) when no tuned config exists.
+    SPECTROGRAM_TUNED_CONFIG overrides the path.
+    """
+    config = {"torchThreads": None, "batchSize": CONSTANTS.BATCH_SIZE, "workers": CONSTANTS.BATCH_WORKERS}
+    path = path or os.environ.get("SPECTROGRAM_TUNED_CONFIG", DEFAULT_TUNED_CONFIG)
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                tuned = json.load(f)
+            config.update({k: tuned[k] for k in config if tuned.get(k)})
+        except (OSError, ValueError) as e:
+            print(f"Error reading tuned config {path}: {e}")
+    return config
+
+
+def applyTorchThreads(threads=None):
+    """Set torch's intra-op thread count (from the tuned config if not given); returns the count in use."""
+    import torch
+    threads = threads or loadTunedConfig()["torchThreads"]
+    if threads:
+        torch.set_num_threads(int(threads))
+    return torch.get_num_threads()
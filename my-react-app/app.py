@@ -3,16 +3,25 @@ import time
 import cv2
 import base64
 import warnings
-from flask import Flask, jsonify, request
+from collections import OrderedDict
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room
 from ultralytics import YOLO
 from PIL import Image
 import torch
 import sys
 import pathlib
 import numpy as np
-import xml.etree.ElementTree as ET
+import CONSTANTS
+from BandProcessor import FrameBands
+from FrameAnnotation import parse_annotation, annotate_image, compute_graph_data
+from SignalTracker import SignalTracker
+from SourceScheduler import parseSources, WeightedFairScheduler
+from ModelRegistry import ModelRegistry, warmupFrames
+from SignalGate import EnergyGate
+from AlertRules import AlertEngine, AlertStore, frameMetrics, loadRuleSpecs
+from TunedConfig import applyTorchThreads
 
 # Suppress FutureWarnings from torch
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -29,6 +38,19 @@ MODEL_PATH = os.path.join(BASE_DIR, "backend", "model", "best.pt")
 IMAGES_FOLDER = os.path.join(BASE_DIR, "images")
 ANNOTATIONS_FOLDER = "/Users/spoorthikoppula/Desktop/Raytheon/1300 spectrograms"
 
+# Spectrogram feeds, e.g. SPECTROGRAM_SOURCES="rx1=/data/rx1:2,rx2=/data/rx2"
+SOURCES = parseSources(os.environ.get("SPECTROGRAM_SOURCES", "")) or {
+    "images": (IMAGES_FOLDER, CONSTANTS.DEFAULT_SOURCE_WEIGHT)
+}
+FRAME_INTERVAL = float(os.environ.get("SPECTROGRAM_FRAME_INTERVAL", CONSTANTS.FRAME_INTERVAL))
+
+# Frames scoring below the gate threshold skip YOLO entirely (0 = gate off)
+signal_gate = EnergyGate(float(os.environ.get("SPECTROGRAM_GATE_THRESHOLD", CONSTANTS.GATE_THRESHOLD)))
+
+# Alert rules run on every frame; fired and resolved alerts are appended to alerts.jsonl
+alert_engine = AlertEngine(loadRuleSpecs(os.environ.get("SPECTROGRAM_ALERT_RULES")),
+                           AlertStore(os.path.join(BASE_DIR, "alerts.jsonl")))
+
 # Folder for high interference spectrograms
 HIGH_INTERFERENCE_FOLDER = os.path.join(BASE_DIR, "high_interference")
 os.makedirs(HIGH_INTERFERENCE_FOLDER, exist_ok=True)
@@ -39,172 +61,194 @@ app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": ["http://localhost:3000"]}})
 socketio = SocketIO(app, cors_allowed_origins=["http://localhost:3000"])
 
-# Load YOLO model
-yolo_model = torch.hub.load(YOLOV5_PATH, 'custom', path=MODEL_PATH, source='local', force_reload=True)
+def load_yolo_model(path):
+    return torch.hub.load(YOLOV5_PATH, 'custom', path=path, source='local')
+
+def warmup_yolo_model(model):
+    for frame_path in warmupFrames(IMAGES_FOLDER):
+        model(Image.open(frame_path).convert("RGB"))
+
+# Torch thread count tuned for this host by autotune.py (torch's default otherwise)
+print(f"Using {applyTorchThreads()} torch threads")
+
+# Load YOLO model; later versions are loaded in the background and swapped in live
+model_registry = ModelRegistry(load_yolo_model, warmup_yolo_model)
+model_registry.load(MODEL_PATH)
+model_registry.watch(MODEL_PATH)
 print("✅ YOLOv5 Model Loaded Successfully!")
 
 # Global variables for streaming and graphing
 STREAM_RUNNING = False
 frame_count = 0
-global_history = []  # We'll keep only the last 10 history points
+source_state = {}  # Per source: frame counter, last 10 history points and signal tracker
 bg_thread = None
+client_tiers = {}  # Socket id -> image tier the client subscribed to
+detail_clients = set()  # Socket ids that opted in to per-frame detections and bands
+DETAIL_ROOM = "detail"
+recent_frames = OrderedDict()  # (source, frame id) -> annotated image, for full-resolution fetches
+
+def get_source_state(source):
+    if source not in source_state:
+        source_state[source] = {"frames": 0, "history": [], "tracker": SignalTracker()}
+    return source_state[source]
+
+def tier_room(tier):
+    return f"tier:{tier}"
+
+def encode_tier(image, tier):
+    """Downscale (if the tier has a max width) and JPEG-encode an image to base64."""
+    width, quality = CONSTANTS.IMAGE_TIERS[tier]
+    if width and image.shape[1] > width:
+        height = round(image.shape[0] * width / image.shape[1])
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return base64.b64encode(buffer).decode("utf-8")
 
-def parse_annotation(xml_path):
-    """Parse XML annotation (Pascal VOC format) and return a list of detections."""
-    detections = []
+def remember_frame(source, frame_id, image):
+    recent_frames[(source, frame_id)] = image
+    recent_frames.move_to_end((source, frame_id))  # A reused key must count as newest, not keep its old slot
+    while len(recent_frames) > CONSTANTS.RECENT_FRAMES_KEPT:
+        recent_frames.popitem(last=False)
+
+def process_frame(source, filepath, tiers=None, persist=True):
+    """
+    Detect, annotate and encode one spectrogram; returns (payload, track_events) or (None, None).
+    payload["images"] holds one encoding per requested tier (default: tiers with subscribers).
+    With persist=False the frame runs against scratch source and alert state and nothing is
+    saved, so benchmarks can call it without touching the live stream.
+    """
+    global frame_count
+    if persist:
+        state = get_source_state(source)
+        engine = alert_engine
+    else:
+        state = {"frames": 0, "history": [], "tracker": SignalTracker()}
+        engine = AlertEngine(alert_engine.specs)
+    filename = os.path.basename(filepath)
+    print(f"[DEBUG] Processing image: {filename} from {source}")
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        for obj in root.findall("object"):
-            name = obj.find("name").text if obj.find("name") is not None else "Unknown"
-            bndbox = obj.find("bndbox")
-            if bndbox is not None:
-                xmin = float(bndbox.find("xmin").text)
-                ymin = float(bndbox.find("ymin").text)
-                xmax = float(bndbox.find("xmax").text)
-                ymax = float(bndbox.find("ymax").text)
-                detections.append({
-                    "xmin": xmin,
-                    "ymin": ymin,
-                    "xmax": xmax,
-                    "ymax": ymax,
-                    "name": name,
-                    "confidence": 1.0
-                })
-        print(f"[DEBUG] Parsed {len(detections)} detections from {xml_path}")
+        img = Image.open(filepath).convert("RGB")
     except Exception as e:
-        print(f"Error parsing XML {xml_path}: {e}")
-    return detections
-
-def annotate_image(image, detections):
-    """Draw bounding boxes and labels on the image."""
-    h, w = image.shape[:2]
-    def get_color(label):
-        colors = {
-            "5g": (0, 0, 255),      # Neon Red
-            "lte": (255, 0, 255),    # Neon Magenta
-            "radar": (0, 255, 0),    # Neon Green
-            "jsss": (255, 165, 0)    # Neon Orange
-        }
-        return colors.get(label.lower(), (255, 255, 255))
-    for det in detections:
-        try:
-            x1, y1, x2, y2 = map(int, [det["xmin"], det["ymin"], det["xmax"], det["ymax"]])
-            label = det["name"]
-            confidence = float(det["confidence"])
-            box_color = get_color(label)
-            text = f"{label} {confidence:.2f}"
-            cv2.rectangle(image, (x1, y1), (x2, y2), box_color, 3)
-            font_scale = 0.8
-            text_thickness = 2
-            text_size = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_thickness)[0]
-            text_x = x1
-            text_y = y1 - 10 if y1 - 10 > text_size[1] else y1 + text_size[1] + 10
-            cv2.rectangle(image, (text_x, text_y - text_size[1] - 5),
-                          (text_x + text_size[0], text_y), (0, 0, 0), -1)
-            cv2.putText(image, text, (text_x, text_y - 3),
-                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), text_thickness)
-        except Exception as e:
-            print(f"Error annotating detection {det}: {e}")
-    return image
-
-def compute_graph_data(detections, img_width, img_height):
-    """Compute the ratio of each bounding box's area to the image area for each signal type."""
-    ratios = {"5G": 0, "LTE": 0, "Radar": 0, "JSSS": 0, "All": 0}
-    img_area = img_width * img_height
-    for det in detections:
+        print(f"Error opening image {filename}: {e}")
+        return None, None
+    base_name, _ = os.path.splitext(filename)
+    xml_path = os.path.join(ANNOTATIONS_FOLDER, base_name + ".xml")
+    if os.path.exists(xml_path):
+        print(f"[DEBUG] Found XML annotation for {filename}")
+        detections = parse_annotation(xml_path)
+    elif not signal_gate.passes(filepath):
+        print(f"[DEBUG] No signal energy in {filename}; skipping YOLO.")
+        detections = []
+    else:
+        print(f"[DEBUG] No XML for {filename}; using YOLO detection.")
+        model_version, yolo_model = model_registry.current()
+        results = yolo_model(img)
         try:
-            x1, y1, x2, y2 = map(float, [det["xmin"], det["ymin"], det["xmax"], det["ymax"]])
-            bbox_area = max(0, x2 - x1) * max(0, y2 - y1)
-            ratio = bbox_area / img_area if img_area > 0 else 0
-            name = det["name"].lower()
-            if name == "5g":
-                ratios["5G"] += ratio
-            elif name == "lte":
-                ratios["LTE"] += ratio
-            elif name == "radar":
-                ratios["Radar"] += ratio
-            elif name == "jsss":
-                ratios["JSSS"] += ratio
-            ratios["All"] += ratio
+            detections = results.pandas().xyxy[0].to_dict(orient="records")
+            for det in detections:
+                det["modelVersion"] = model_version
         except Exception as e:
-            print(f"Error computing ratio for detection {det}: {e}")
-    return ratios
+            print(f"Error extracting detections from YOLO for {filename}: {e}")
+            detections = []
+    # Collapse full-height boxes into per-class frequency bands
+    bands = FrameBands(detections)
+    img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+    annotated_img = annotate_image(img_cv, detections)
+    h, w = annotated_img.shape[:2]
+    ratios = compute_graph_data(detections, w, h)
+    if persist:
+        frame_count += 1
+    state["frames"] += 1
+    track_events = state["tracker"].update(detections, state["frames"])
+    alerts = engine.evaluate(source, bands, frameMetrics(bands, w, detections), state["frames"])
+    history_point = {
+        "time": state["frames"],
+        "5G": ratios["5G"],
+        "LTE": ratios["LTE"],
+        "Radar": ratios["Radar"],
+        "JSSS": ratios["JSSS"],
+        "All": ratios["All"]
+    }
+    state["history"].append(history_point)
+    # Keep only the last 10 history points
+    if len(state["history"]) > CONSTANTS.HISTORY_LENGTH:
+        state["history"] = state["history"][-CONSTANTS.HISTORY_LENGTH:]
+        
+    # Save spectrogram while the high-interference rule fires (band occupancy >= HIGH_INTERFERENCE_RATIO by default)
+    if persist and engine.isFiring(source, CONSTANTS.HIGH_INTERFERENCE_RULE):
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        high_intf_filename = f"high_interference_{source}_{frame_count}_{timestamp}.jpg"
+        high_intf_filepath = os.path.join(HIGH_INTERFERENCE_FOLDER, high_intf_filename)
+        cv2.imwrite(high_intf_filepath, annotated_img)
+        print(f"[DEBUG] Saved high interference image: {high_intf_filepath}")
+        
+    if persist:
+        debug_path = os.path.join(BASE_DIR, "debug_annotated.jpg")
+        cv2.imwrite(debug_path, annotated_img)
+        print(f"[DEBUG] Saved debug image: {debug_path}")
+    # Each subscribed tier is encoded once per frame; full resolution is kept for on-demand fetches.
+    if tiers is None:
+        tiers = set(client_tiers.values())
+    if persist:
+        remember_frame(source, state["frames"], annotated_img)
+    payload = {
+        "source": source,
+        "images": {tier: encode_tier(annotated_img, tier) for tier in tiers},
+        "frameId": state["frames"],
+        "detections": detections,
+        "bands": bands.toDict(),
+        "graphData": state["history"],
+        "alerts": alerts,
+        "time": state["frames"]
+    }
+    return payload, track_events
 
 def process_images():
     """Cycle through images every 2 seconds, compute annotations, graph data, and emit updates."""
-    global frame_count, global_history, STREAM_RUNNING
-    images = sorted(os.listdir(IMAGES_FOLDER))
-    if not images:
+    global STREAM_RUNNING
+    # All feeds share the one loaded model; weighted fair scheduling picks the next feed.
+    scheduler = WeightedFairScheduler({name: weight for name, (_, weight) in SOURCES.items()})
+    feeds = {}
+    for source, (folder, _) in SOURCES.items():
+        try:
+            images = sorted(os.listdir(folder))
+        except OSError as e:
+            print(f"Error reading images folder {folder} for source {source}: {e}")
+            continue
+        if images:
+            feeds[source] = {"folder": folder, "images": images, "idx": 0}
+    if not feeds:
         print("[DEBUG] No images found in the images folder.")
         return
-    idx = 0
     while STREAM_RUNNING:
-        filename = images[idx % len(images)]
-        filepath = os.path.join(IMAGES_FOLDER, filename)
+        source = scheduler.next(feeds)
+        feed = feeds[source]
+        filename = feed["images"][feed["idx"] % len(feed["images"])]
+        feed["idx"] += 1
+        filepath = os.path.join(feed["folder"], filename)
         if not os.path.isfile(filepath):
-            idx += 1
             continue
-        print(f"[DEBUG] Processing image: {filename}")
-        try:
-            img = Image.open(filepath).convert("RGB")
-        except Exception as e:
-            print(f"Error opening image {filename}: {e}")
-            idx += 1
+        payload, track_events = process_frame(source, filepath)
+        scheduler.record(source, payload is not None)
+        if payload is None:
             continue
-        base_name, _ = os.path.splitext(filename)
-        xml_path = os.path.join(ANNOTATIONS_FOLDER, base_name + ".xml")
-        if os.path.exists(xml_path):
-            print(f"[DEBUG] Found XML annotation for {filename}")
-            detections = parse_annotation(xml_path)
-        else:
-            print(f"[DEBUG] No XML for {filename}; using YOLO detection.")
-            results = yolo_model(img)
-            try:
-                detections = results.pandas().xyxy[0].to_dict(orient="records")
-            except Exception as e:
-                print(f"Error extracting detections from YOLO for {filename}: {e}")
-                detections = []
-        img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-        annotated_img = annotate_image(img_cv, detections)
-        h, w = annotated_img.shape[:2]
-        ratios = compute_graph_data(detections, w, h)
-        frame_count += 1
-        history_point = {
-            "time": frame_count,
-            "5G": ratios["5G"],
-            "LTE": ratios["LTE"],
-            "Radar": ratios["Radar"],
-            "JSSS": ratios["JSSS"],
-            "All": ratios["All"]
-        }
-        global_history.append(history_point)
-        # Keep only the last 10 history points
-        if len(global_history) > 10:
-            global_history = global_history[-10:]
-            
-        # Save spectrogram if interference (All ratio) is >= 50%
-        noisePercent = ratios["All"] * 100
-        if noisePercent >= 50:
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            high_intf_filename = f"high_interference_{frame_count}_{timestamp}.jpg"
-            high_intf_filepath = os.path.join(HIGH_INTERFERENCE_FOLDER, high_intf_filename)
-            cv2.imwrite(high_intf_filepath, annotated_img)
-            print(f"[DEBUG] Saved high interference image: {high_intf_filepath}")
-            
-        debug_path = os.path.join(BASE_DIR, "debug_annotated.jpg")
-        cv2.imwrite(debug_path, annotated_img)
-        print(f"[DEBUG] Saved debug image: {debug_path}")
-        _, buffer = cv2.imencode(".jpg", annotated_img)
-        encoded_img = base64.b64encode(buffer).decode("utf-8")
-        socketio.emit("new_detection", {
-            "image": encoded_img,
-            "detections": detections,
-            "graphData": global_history,
-            "time": frame_count
-        })
-        idx += 1
-        time.sleep(2)  # Update every 2 seconds
+        payload["counters"] = scheduler.counters[source]
+        payload["sentAt"] = time.time()  # Lets clients measure end-to-end latency
+        alerts = payload.pop("alerts")
+        # Full detections and bands go only to clients that asked for them; track_events carry the changes.
+        detail = {"source": source, "frameId": payload["frameId"],
+                  "detections": payload.pop("detections"), "bands": payload.pop("bands")}
+        if detail_clients:
+            socketio.emit("frame_detail", detail, to=DETAIL_ROOM)
+        for tier, encoded_img in payload.pop("images").items():
+            socketio.emit("new_detection", dict(payload, image=encoded_img, tier=tier), to=tier_room(tier))
+        # Only births, moves and deaths of tracks go out on this channel
+        if track_events:
+            socketio.emit("track_events", {"source": source, "time": payload["time"], "events": track_events})
+        # Alerts have their own channel so clients can listen without the frame stream
+        if alerts:
+            socketio.emit("alerts", {"source": source, "time": payload["time"], "alerts": alerts})
+        time.sleep(FRAME_INTERVAL)  # Update every 2 seconds by default
 
 # --- Control Endpoints ---
 @app.route("/start", methods=["POST"])
@@ -225,18 +269,100 @@ def stop_stream():
 
 @app.route("/reset", methods=["POST"])
 def reset_stream():
-    global STREAM_RUNNING, frame_count, global_history
+    global STREAM_RUNNING, frame_count
     STREAM_RUNNING = False
     frame_count = 0
-    global_history = []
+    source_state.clear()
+    # Frame ids restart at 1, so frames kept from before the reset would answer for new ids.
+    recent_frames.clear()
+    alert_engine.reset()
     print("[DEBUG] Reset command received")
     STREAM_RUNNING = True
     socketio.start_background_task(target=process_images)
     return jsonify({"message": "Reset and restarted processing images"}), 200
 
+# --- Model Endpoints ---
+@app.route("/model", methods=["GET"])
+def model_status():
+    return jsonify(model_registry.status()), 200
+
+@app.route("/model/load", methods=["POST"])
+def load_model():
+    path = (request.get_json(silent=True) or {}).get("path", MODEL_PATH)
+    if not os.path.isfile(path):
+        return jsonify({"message": f"Model file not found: {path}"}), 400
+    if not model_registry.loadAsync(path):
+        return jsonify({"message": "A model is already loading"}), 409
+    return jsonify({"message": f"Loading model from {path}"}), 202
+
+@app.route("/model/rollback", methods=["POST"])
+def rollback_model():
+    version = model_registry.rollback()
+    if version is None:
+        return jsonify({"message": "No previous model version to roll back to"}), 400
+    return jsonify({"message": f"Rolled back to model {version}"}), 200
+
+# --- Gate Endpoints ---
+@app.route("/gate", methods=["GET"])
+def gate_status():
+    return jsonify(signal_gate.rates()), 200
+
+@app.route("/gate", methods=["POST"])
+def tune_gate():
+    threshold = (request.get_json(silent=True) or {}).get("threshold")
+    if not isinstance(threshold, (int, float)):
+        return jsonify({"message": "Expected a numeric threshold"}), 400
+    signal_gate.threshold = float(threshold)
+    signal_gate.reset()
+    return jsonify({"message": f"Gate threshold set to {threshold}"}), 200
+
+# --- Alert Endpoints ---
+@app.route("/alerts", methods=["GET"])
+def recent_alerts():
+    limit = request.args.get("limit", default=50, type=int)
+    events = alert_engine.store.recent(limit, request.args.get("source"))
+    return jsonify({"active": alert_engine.active(), "events": events, "rules": alert_engine.specs}), 200
+
+# --- Full Resolution Frames ---
+@app.route("/frame/<source>/<int:frame_id>", methods=["GET"])
+def full_frame(source, frame_id):
+    image = recent_frames.get((source, frame_id))
+    if image is None:
+        return jsonify({"message": f"Frame {frame_id} from {source} is no longer available"}), 404
+    _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, CONSTANTS.IMAGE_TIERS["full"][1]])
+    return Response(buffer.tobytes(), mimetype="image/jpeg")
+
+def subscribe_client(tier):
+    previous = client_tiers.get(request.sid)
+    if previous:
+        leave_room(tier_room(previous))
+    join_room(tier_room(tier))
+    client_tiers[request.sid] = tier
+
 @socketio.on("connect")
 def handle_connect():
     print("[DEBUG] Client connected.")
+    subscribe_client(CONSTANTS.DEFAULT_IMAGE_TIER)
+
+@socketio.on("subscribe")
+def handle_subscribe(data):
+    tier = (data or {}).get("tier")
+    if tier not in CONSTANTS.IMAGE_TIERS:
+        return {"error": f"Unknown tier {tier}; expected one of {list(CONSTANTS.IMAGE_TIERS)}"}
+    subscribe_client(tier)
+    # {"detail": true} also sends each frame's full detections and bands on "frame_detail".
+    if (data or {}).get("detail"):
+        join_room(DETAIL_ROOM)
+        detail_clients.add(request.sid)
+    elif request.sid in detail_clients:
+        leave_room(DETAIL_ROOM)
+        detail_clients.discard(request.sid)
+    return {"tier": tier, "detail": request.sid in detail_clients}
+
+@socketio.on("disconnect")
+def handle_disconnect():
+    client_tiers.pop(request.sid, None)
+    detail_clients.discard(request.sid)
 
 if __name__ == "__main__":
     socketio.run(app, debug=True, host="0.0.0.0", port=5000)
@@ -21,17 +21,33 @@ YOLOV5_PATH = os.path.join(os.path.dirname(__file__), "yolov5")
 # Ensure YOLOv5 is added to the system path
 sys.path.append(YOLOV5_PATH)
 
+# Shared modules (CONSTANTS, ModelRegistry) live one level up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import CONSTANTS
+from ModelRegistry import ModelRegistry, warmupFrames
+from BandProcessor import FrameBands
+from AlertRules import AlertEngine, AlertStore, frameMetrics, loadRuleSpecs
+
 # Correct model path
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "Model/best.pt")
 
-# Load YOLOv5 model correctly
-yolo_model = torch.hub.load(YOLOV5_PATH, 'custom', path=MODEL_PATH, source='local', force_reload=True)
+# Folder containing spectrogram images
+IMAGES_FOLDER = "images"
 
-print("✅ YOLOv5 Model Loaded Successfully!")
+# Load YOLOv5 model correctly; replacing the weights file hot-swaps it without a restart
+model_registry = ModelRegistry(
+    lambda path: torch.hub.load(YOLOV5_PATH, 'custom', path=path, source='local'),
+    lambda model: [model(Image.open(p)) for p in warmupFrames(IMAGES_FOLDER)]
+)
+model_registry.load(MODEL_PATH)
+model_registry.watch(MODEL_PATH)
 
+print("✅ YOLOv5 Model Loaded Successfully!")
 
-# Folder containing spectrogram images
-IMAGES_FOLDER = "images"
+# Same alert rules as the main stream; the warning flag follows the crowded-frame rule.
+# Fired and resolved alerts are appended to alerts.jsonl and sent on the "alerts" channel.
+alert_engine = AlertEngine(loadRuleSpecs(os.environ.get("SPECTROGRAM_ALERT_RULES")),
+                           AlertStore(os.path.join(os.path.dirname(__file__), "alerts.jsonl")))
 
 # Global variables for streaming and graphing
 STREAM_RUNNING = False
@@ -77,8 +93,11 @@ def process_images():
                 
                 # Run YOLO detection
                 try:
+                    model_version, yolo_model = model_registry.current()
                     results = yolo_model(img)
                     detections = results[0].pandas().xyxy[0].to_dict(orient="records")
+                    for det in detections:
+                        det["modelVersion"] = model_version
                 except Exception as e:
                     print(f"Error running YOLO on image {filename}: {e}")
                     detections = []
@@ -104,8 +123,11 @@ def process_images():
                 }
                 global_history.append(history_point)
                 
-                # Set warning flag if more than 5 detections appear in this image
-                warning_flag = len(detections) > 5
+                # Set warning flag while the crowded-frame rule fires (more than 5 detections by default)
+                bands = FrameBands(detections)
+                alerts = alert_engine.evaluate(IMAGES_FOLDER, bands, frameMetrics(bands, img.size[0], detections),
+                                               frame_count)
+                warning_flag = alert_engine.isFiring(IMAGES_FOLDER, CONSTANTS.CROWDED_FRAME_RULE)
                 
                 # Encode the image to Base64 for sending to the client
                 encoded_img = encode_image(filepath)
@@ -117,6 +139,8 @@ def process_images():
                     "warning": warning_flag,
                     "graphData": global_history
                 })
+                if alerts:
+                    socketio.emit("alerts", {"source": IMAGES_FOLDER, "time": frame_count, "alerts": alerts})
                 
                 processed_files.add(filename)
                 time.sleep(1)  # Small delay between images
@@ -149,6 +173,12 @@ def reset_stream():
     STREAM_RUNNING = True
     return jsonify({"message": "Reset successful"}), 200
 
+@app.route("/alerts", methods=["GET"])
+def recent_alerts():
+    limit = request.args.get("limit", default=50, type=int)
+    events = alert_engine.store.recent(limit, request.args.get("source"))
+    return jsonify({"active": alert_engine.active(), "events": events, "rules": alert_engine.specs}), 200
+
 @socketio.on("connect")
 def handle_connect():
     print("Client connected – starting image processing background task.")
@@ -203,33 +203,66 @@ function InfoTabs({ onClose }) {
   );
 }
 
+function interferenceWarning(graphData) {
+  const pct = graphData.slice(-1)[0]?.All * 100;
+  return pct >= 50
+    ? "Significant interference. Immediate attention required!"
+    : pct >= 25
+    ? "Moderate interference detected."
+    : "";
+}
+
 export default function App() {
-  const [spectrogram, setSpectrogram] = useState(null);
-  const [graphData, setGraphData] = useState([]);
+  // Latest frame, graph history and counters per source, so feeds never overwrite each other.
+  const [feeds, setFeeds] = useState({});
+  const [selectedSource, setSelectedSource] = useState(null);
   const [statusMsg, setStatusMsg] = useState("");
-  const [timeStamp, setTimeStamp] = useState(null);
-  const [warning, setWarning] = useState("");
   const [showInfo, setShowInfo] = useState(false);
+  const [alerts, setAlerts] = useState([]);
 
   useEffect(() => {
+    // Rule engine alerts arrive on their own channel; keep the latest few.
+    socket.on("alerts", (data) => setAlerts((prev) => [...data.alerts.reverse(), ...prev].slice(0, 5)));
+    return () => socket.off("alerts");
+  }, []);
+
+  useEffect(() => {
+    // Live view only needs the preview tier; full resolution is fetched on click.
+    const subscribe = () => socket.emit("subscribe", { tier: "preview" });
+    socket.on("connect", subscribe);
+    if (socket.connected) subscribe();
     socket.on("new_detection", (data) => {
-      if (data.image) setSpectrogram(`data:image/jpeg;base64,${data.image}`);
-      if (data.graphData) {
-        setGraphData(data.graphData);
-        const pct = data.graphData.slice(-1)[0]?.All * 100;
-        setWarning(
-          pct >= 50
-            ? "Significant interference. Immediate attention required!"
-            : pct >= 25
-            ? "Moderate interference detected."
-            : ""
-        );
-      }
-      if (data.time) setTimeStamp(data.time);
+      setFeeds((prev) => {
+        const feed = { ...prev[data.source] };
+        if (data.image) feed.spectrogram = `data:image/jpeg;base64,${data.image}`;
+        if (data.frameId !== undefined) feed.frameRef = { source: data.source, frameId: data.frameId };
+        if (data.graphData) feed.graphData = data.graphData;
+        if (data.counters) feed.counters = data.counters;
+        if (data.time) feed.timeStamp = data.time;
+        return { ...prev, [data.source]: feed };
+      });
+      // The first feed to report is shown until another one is picked.
+      setSelectedSource((prev) => prev ?? data.source);
     });
-    return () => socket.off("new_detection");
+    return () => {
+      socket.off("connect", subscribe);
+      socket.off("new_detection");
+    };
   }, []);
 
+  const feed = feeds[selectedSource] || {};
+  const { spectrogram = null, frameRef = null, timeStamp = null } = feed;
+  const graphData = feed.graphData || [];
+  const warning = interferenceWarning(graphData);
+
+  const openFullFrame = () => {
+    if (!frameRef) return;
+    window.open(
+      `http://localhost:5000/frame/${encodeURIComponent(frameRef.source)}/${frameRef.frameId}`,
+      "_blank"
+    );
+  };
+
   useEffect(() => {
     const style = document.createElement("style");
     style.innerHTML = `
@@ -306,10 +339,35 @@ export default function App() {
 
       {showInfo && <InfoTabs onClose={() => setShowInfo(false)} />}
 
+      {Object.keys(feeds).length > 1 && (
+        <div style={{ display: "flex", justifyContent: "center", gap: "10px", padding: "10px" }}>
+          {Object.keys(feeds).map((source) => (
+            <button
+              key={source}
+              onClick={() => setSelectedSource(source)}
+              style={{
+                padding: "5px 10px",
+                borderRadius: "5px",
+                background: source === selectedSource ? "#FFF" : "transparent",
+                color: source === selectedSource ? "#000" : "#FFF",
+              }}
+            >
+              {source}
+            </button>
+          ))}
+        </div>
+      )}
+
       <div style={{ display: "flex", padding: "10px", gap: "20px" }}>
         <div style={{ flex: 1 }}>
           {spectrogram ? (
-            <img src={spectrogram} alt="Spectrogram" style={{ width: "100%" }} />
+            <img
+              src={spectrogram}
+              alt="Spectrogram"
+              title="Click for full resolution"
+              onClick={openFullFrame}
+              style={{ width: "100%", cursor: frameRef ? "zoom-in" : "default" }}
+            />
           ) : (
             <p style={{ textAlign: "center" }}>Waiting for spectrogram…</p>
           )}
@@ -319,6 +377,14 @@ export default function App() {
               <strong>⚠️ {warning}</strong>
             </div>
           )}
+          {alerts.map((alert) => (
+            <p
+              key={`${alert.rule}-${alert.source}-${alert.time}`}
+              style={{ margin: "4px 10px", color: alert.state === "firing" ? "#C00" : "#080" }}
+            >
+              {alert.state === "firing" ? "🔔" : "✅"} [{alert.source}] {alert.message} ({alert.state})
+            </p>
+          ))}
         </div>
 
         <div style={{ flex: 1 }}>
@@ -330,6 +396,16 @@ export default function App() {
         </div>
       </div>
 
+      {Object.keys(feeds).length > 1 && (
+        <p style={{ textAlign: "center", margin: "4px 0" }}>
+          {Object.entries(feeds)
+            .filter(([, f]) => f.counters)
+            .map(([source, f]) => `${source}: ${f.counters.classified}/${f.counters.scheduled} classified, ` +
+              `${f.counters.failed} failed`)
+            .join("   ")}
+        </p>
+      )}
+
       {statusMsg && <p style={{ textAlign: "center", padding: "10px 0" }}>{statusMsg}</p>}
     </div>
   );
@@ -5,9 +5,14 @@ import torch
 import os
 import io
 import sys
+import time
+import numpy as np
 from pathlib import Path
 from PIL import Image
+from torchvision.ops import batched_nms
 import CONSTANTS
+from ModelRegistry import ModelRegistry, warmupFrames
+from TunedConfig import applyTorchThreads
 
 # Add YOLOv5 directory to system path
 YOLOV5_DIR = str(Path(__file__).resolve().parent / "yolov5")
@@ -17,15 +22,86 @@ from yolov5.models.common import DetectMultiBackend
 
 # ✅ Use the fixed model path
 FIXED_MODEL_PATH = "/Users/spoorthikoppula/Desktop/Raytheon/Model/best_fixed.pt"
+DEFAULT_MODEL_PATH = str(Path(__file__).resolve().parent / "Model" / "best.pt")
+
+def tileOrigins(length, tileSize, overlap):
+    """Start offsets of overlapping tiles that cover [0, length)."""
+    if length <= tileSize:
+        return [0]
+    stride = max(1, int(tileSize * (1 - overlap)))
+    origins = list(range(0, length - tileSize, stride))
+    origins.append(length - tileSize)
+    return origins
+
+
+def overSmaller(a, b):
+    """Intersection of two [x1, y1, x2, y2] boxes over the area of the smaller one."""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return w * h / smaller if smaller > 0 else 0.0
+
+
+def mergeTileDetections(boxes, scores, classes, clipped, iouThreshold=CONSTANTS.TILE_NMS_IOU,
+                        fragmentOverlap=CONSTANTS.TILE_FRAGMENT_OVERLAP):
+    """
+    Merge detections gathered from overlapping tiles.
+    Duplicates are removed with class-aware NMS, then boxes of the same class
+    that were cut by a tile seam are fused into one box spanning both fragments.
+    A fragment mostly inside another box of its class (intersection over the
+    smaller box at least fragmentOverlap) is fused into it too, since NMS keeps
+    a small fragment whose IoU with the complete box is low.
+    Returns a list of [xmin, ymin, xmax, ymax, confidence, class] rows.
+    """
+    if len(boxes) == 0:
+        return []
+    keep = batched_nms(boxes, scores, classes, iouThreshold).tolist()  # sorted by score
+    merged = []
+    for i in keep:
+        x1, y1, x2, y2 = boxes[i].tolist()
+        cls = int(classes[i])
+        fused = False
+        for row in merged:
+            if row[5] != cls or not (clipped[i] or row[6]):
+                continue
+            overlap = overSmaller(row, (x1, y1, x2, y2))
+            # Two fragments join on any overlap; a fragment and a complete box only when one mostly covers the other.
+            if overlap > 0 and ((clipped[i] and row[6]) or overlap >= fragmentOverlap):
+                row[0], row[1] = min(row[0], x1), min(row[1], y1)
+                row[2], row[3] = max(row[2], x2), max(row[3], y2)
+                row[6] = row[6] and bool(clipped[i])
+                fused = True
+                break
+        if not fused:
+            merged.append([x1, y1, x2, y2, float(scores[i]), cls, bool(clipped[i])])
+    return [row[:6] for row in merged]
+
+
+def createRegistry(modelPath=DEFAULT_MODEL_PATH, warmupFolder="images"):
+    """Model registry serving modelAPI instances, each warmed on a few frames from warmupFolder."""
+    def warmup(model):
+        for framePath in warmupFrames(warmupFolder):
+            model.classify(framePath)
+
+    registry = ModelRegistry(modelAPI, warmup)
+    registry.load(modelPath)
+    return registry
+
 
 # Load YOLOv5 model correctly
 class modelAPI:
-    def __init__(self, modelPath=str(Path(__file__).resolve().parent / "Model" / "best.pt")):
-        print(f"Loading YOLOv5 model from {modelPath}...")
+    def __init__(self, modelPath=DEFAULT_MODEL_PATH, threads=None):
+        # Tuned per host by autotune.py; several workers on torch's default count oversubscribe the cores
+        self.threads = applyTorchThreads(threads)
+        print(f"Loading YOLOv5 model from {modelPath} ({self.threads} torch threads)...")
         self.model = torch.hub.load(YOLOV5_DIR, 'custom', path=modelPath, source='local')
         self.model.eval()
         # Save the names mapping (if available)
         self.names = self.model.names if hasattr(self.model, 'names') else {}
+        # Set by ModelRegistry; copied onto every detection
+        self.version = None
         print("✅ YOLOv5 Model Loaded Successfully!")
 
     def classify(self, filePath=None):
@@ -35,14 +111,90 @@ class modelAPI:
             img = Image.open(filePath)
             results = self.model(img)
             # Get the detections as a list of dictionaries.
-            detections = results.pandas().xyxy[0].to_dict(orient="records")
-            # Update each detection with the correct name if missing or wrong.
-            for det in detections:
-                # If the 'name' key is missing or not set correctly, try to use the class index.
-                if 'name' not in det or not det['name']:
-                    # Use the model’s names mapping.
-                    class_idx = int(det.get('class', -1))
-                    det['name'] = self.names.get(class_idx, "Unknown")
+            return self.labelDetections(results.pandas().xyxy[0].to_dict(orient="records"), img.size[0])
+        except Exception as e:
+            return (CONSTANTS.FAILURE, f"Error processing image: {e}")
+
+    def classifyArray(self, image):
+        """Classify an RGB uint8 array already in memory, such as a shared-memory frame view."""
+        if image is None:
+            return (CONSTANTS.FAILURE, "No image given")
+        try:
+            results = self.model(image)
+            return self.labelDetections(results.pandas().xyxy[0].to_dict(orient="records"), image.shape[1])
+        except Exception as e:
+            return (CONSTANTS.FAILURE, f"Error processing image: {e}")
+
+    def labelDetections(self, detections, width=None):
+        # Update each detection with the correct name if missing or wrong.
+        # imageWidth lets callers measure band occupancy without reopening the frame.
+        for det in detections:
+            # If the 'name' key is missing or not set correctly, try to use the class index.
+            if 'name' not in det or not det['name']:
+                # Use the model’s names mapping.
+                class_idx = int(det.get('class', -1))
+                det['name'] = self.names.get(class_idx, "Unknown")
+            det['modelVersion'] = self.version
+            det['imageWidth'] = width
+        return detections
+
+    def classifyBatch(self, filePaths):
+        """Classify several spectrograms in one forward pass; returns one detection list per file."""
+        if not filePaths:
+            return (CONSTANTS.FAILURE, "No file paths given")
+        try:
+            images = [Image.open(filePath) for filePath in filePaths]
+            results = self.model(images)
+            return [self.labelDetections(frame.to_dict(orient="records"), img.size[0])
+                    for img, frame in zip(images, results.pandas().xyxy)]
+        except Exception as e:
+            return (CONSTANTS.FAILURE, f"Error processing images: {e}")
+
+    def classifyTiled(self, filePath=None, tileSize=CONSTANTS.TILE_SIZE, overlap=CONSTANTS.TILE_OVERLAP, stats=None):
+        """
+        Classify a large spectrogram at full resolution by splitting it into
+        overlapping tiles that are run through the model as a single batch.
+        The tile count (and so the cost) grows linearly with image area.
+        If a dict is passed as stats, this call's tile count and timings are
+        written into it; callers on other threads each pass their own.
+        """
+        if not filePath:
+            return (CONSTANTS.FAILURE, "No file path given")
+        try:
+            img = np.asarray(Image.open(filePath).convert("RGB"))
+            h, w = img.shape[:2]
+            origins = [(x, y) for y in tileOrigins(h, tileSize, overlap)
+                       for x in tileOrigins(w, tileSize, overlap)]
+            tiles = [img[y:y + tileSize, x:x + tileSize] for x, y in origins]
+
+            start = time.perf_counter()
+            results = self.model(tiles, size=tileSize)
+            elapsedMs = (time.perf_counter() - start) * 1000
+
+            margin = CONSTANTS.TILE_EDGE_MARGIN
+            boxes, scores, classes, clipped = [], [], [], []
+            for (x, y), tile, pred in zip(origins, tiles, results.xyxy):
+                th, tw = tile.shape[:2]
+                for x1, y1, x2, y2, conf, cls in pred.tolist():
+                    # A box touching an interior tile edge is likely a fragment of a larger signal.
+                    clipped.append((x > 0 and x1 <= margin) or (x + tw < w and x2 >= tw - margin) or
+                                   (y > 0 and y1 <= margin) or (y + th < h and y2 >= th - margin))
+                    boxes.append([x1 + x, y1 + y, x2 + x, y2 + y])
+                    scores.append(conf)
+                    classes.append(int(cls))
+
+            merged = mergeTileDetections(torch.tensor(boxes).reshape(-1, 4), torch.tensor(scores),
+                                         torch.tensor(classes, dtype=torch.int64), clipped)
+            detections = [{
+                "xmin": x1, "ymin": y1, "xmax": x2, "ymax": y2,
+                "confidence": conf, "class": cls,
+                "name": self.names.get(cls, "Unknown"),
+                "modelVersion": self.version,
+                "imageWidth": w
+            } for x1, y1, x2, y2, conf, cls in merged]
+
+            if stats is not None:
+                stats.update(tiles=len(tiles), tileSize=tileSize, totalMs=elapsedMs, msPerTile=elapsedMs / len(tiles))
             return detections
         except Exception as e:
             return (CONSTANTS.FAILURE, f"Error processing image: {e}")
@@ -0,0 +1,198 @@
+# run_benchmarks.py
+"""
+Micro-benchmarks for the spectrogram hot paths.
+
+Runs each case on a fixed set of frames from my-react-app/images and
+annotations from "1300 spectrograms/annotations", writes the timings as
+JSON and compares them with a stored baseline. Exits non-zero when any
+case is slower than the baseline by more than the regression threshold.
+
+    python run_benchmarks.py                          # run and compare with benchmark_baseline.json
+    python run_benchmarks.py --save-baseline          # record a new baseline
+    python run_benchmarks.py --cases parse_annotation compute_graph_data --threshold 0.2
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT_DIR, "my-react-app")
+IMAGES_DIR = os.path.join(APP_DIR, "images")
+ANNOTATIONS_DIR = os.path.join(ROOT_DIR, "1300 spectrograms", "annotations")
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "benchmark_baseline.json")
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, "benchmark_results.json")
+
+# app.py, FrameAnnotation.py, SimpleUI.py and CONSTANTS.py live in my-react-app
+sys.path.append(APP_DIR)
+
+# Frame names are fixed so every run measures the same inputs
+SAMPLE_FRAMES = ["1", "2", "10", "100", "250", "500", "750", "1000"]
+BATCH_SIZE = 4
+
+
+def timeCase(fn, repeat, warmup):
+    """Run fn `warmup` times untimed, then `repeat` times; returns stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "min_ms": samples[0],
+        "p95_ms": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "repeat": repeat
+    }
+
+
+def loadInputs():
+    import cv2
+    frames = []
+    for name in SAMPLE_FRAMES:
+        imagePath = os.path.join(IMAGES_DIR, name + ".jpg")
+        xmlPath = os.path.join(ANNOTATIONS_DIR, name + ".xml")
+        if os.path.isfile(imagePath) and os.path.isfile(xmlPath):
+            frames.append({"name": name, "image": imagePath, "xml": xmlPath, "pixels": cv2.imread(imagePath)})
+    if not frames:
+        raise SystemExit(f"No benchmark frames found in {IMAGES_DIR}")
+    return frames
+
+
+def buildCases(frames):
+    """
+    Map case name -> zero-argument callable that processes every sample frame once.
+    app (which loads the model and starts the model watcher), SimpleUI (Qt) and the
+    model are imported on a case's first call, so only the selected cases pay for them.
+    """
+    import cv2
+    import FrameAnnotation
+
+    detections = [FrameAnnotation.parse_annotation(frame["xml"]) for frame in frames]
+    annotated = [FrameAnnotation.annotate_image(frame["pixels"].copy(), dets)
+                 for frame, dets in zip(frames, detections)]
+    model = {}
+
+    def getModel():
+        if "api" not in model:
+            from runModelOnImage import modelAPI
+            model["api"] = modelAPI()
+        return model["api"]
+
+    def encodeFrames():
+        for image in annotated:
+            _, buffer = cv2.imencode(".jpg", image)
+            base64.b64encode(buffer).decode("utf-8")
+
+    def classifyBatched():
+        paths = [frame["image"] for frame in frames]
+        for i in range(0, len(paths), BATCH_SIZE):
+            getModel().classifyBatch(paths[i:i + BATCH_SIZE])
+
+    def annotateSimpleUI():
+        import SimpleUI
+        for frame, dets in zip(frames, detections):
+            SimpleUI.annotate_image(frame["pixels"].copy(), dets)
+
+    def processFrames():
+        import app
+        # persist=False: no saved images and no changes to the live stream's source or alert state.
+        for frame in frames:
+            app.process_frame("benchmark", frame["image"], tiers=[app.CONSTANTS.DEFAULT_IMAGE_TIER], persist=False)
+
+    return {
+        "parse_annotation": lambda: [FrameAnnotation.parse_annotation(frame["xml"]) for frame in frames],
+        # Both annotators draw in place, so each call gets a fresh copy of the frame.
+        "annotate_image_app": lambda: [FrameAnnotation.annotate_image(frame["pixels"].copy(), dets)
+                                       for frame, dets in zip(frames, detections)],
+        "annotate_image_simpleui": annotateSimpleUI,
+        "compute_graph_data": lambda: [FrameAnnotation.compute_graph_data(dets, frame["pixels"].shape[1],
+                                                                          frame["pixels"].shape[0])
+                                       for frame, dets in zip(frames, detections)],
+        "jpeg_base64_encode": encodeFrames,
+        "classify_single": lambda: [getModel().classify(frame["image"]) for frame in frames],
+        "classify_batched": classifyBatched,
+        "process_frame": processFrames,
+    }
+
+
+def compare(results, baseline, threshold):
+    """List of (case, current, baseline, ratio) for cases slower than baseline * (1 + threshold)."""
+    regressions = []
+    for case, stats in results["cases"].items():
+        reference = baseline.get("cases", {}).get(case)
+        if not reference:
+            continue
+        ratio = stats["median_ms"] / reference["median_ms"] if reference["median_ms"] > 0 else 1.0
+        if ratio > 1 + threshold:
+            regressions.append((case, stats["median_ms"], reference["median_ms"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the spectrogram hot paths.")
+    parser.add_argument("--cases", nargs="*", help="Subset of cases to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed runs per case")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write this run's JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown of the median vs baseline (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    frames = loadInputs()
+    cases = buildCases(frames)
+    selected = args.cases or list(cases)
+    unknown = [case for case in selected if case not in cases]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}. Available: {', '.join(cases)}")
+
+    results = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "frames": [frame["name"] for frame in frames],
+        "cases": {}
+    }
+    for case in selected:
+        stats = timeCase(cases[case], args.repeat, args.warmup)
+        stats["per_frame_ms"] = stats["median_ms"] / len(frames)
+        results["cases"][case] = stats
+        print(f"{case:<26} median {stats['median_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  "
+              f"({stats['per_frame_ms']:.2f} ms/frame)")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for case, current, reference, ratio in regressions:
+        print(f"REGRESSION {case}: {current:.2f} ms vs baseline {reference:.2f} ms ({(ratio - 1) * 100:+.1f}%)")
+    if regressions:
+        return 1
+    print(f"No regressions beyond {args.threshold * 100:.0f}% of baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+# run_soak_test.py
+"""
+Load and soak test for the Flask-SocketIO stream in my-react-app/app.py.
+
+Starts the real app on localhost with a stub model, attaches N simulated
+dashboard clients and drives /start, /stop and /reset while recording
+end-to-end frame latency, delivered fps, dropped frames and server RSS.
+
+    python run_soak_test.py --clients 50 --duration 86400 --link-kbps 2000 --processing-ms 30
+    python run_soak_test.py --clients 5 --duration 120 --frame-interval 0.2 --reset-every 60
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT_DIR, "my-react-app")
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, "soak_results.json")
+STUB_CLASSES = ["5G", "LTE", "Radar", "JSSS"]
+
+
+##############################################
+# Stub model (server side)
+##############################################
+class StubFrame:
+    def __init__(self, records):
+        self.records = records
+
+    def to_dict(self, orient="records"):
+        return [dict(record) for record in self.records]
+
+
+class StubResults:
+    def __init__(self, records):
+        self.xyxy = [StubFrame(records)]
+
+    def pandas(self):
+        return self
+
+
+class StubModel:
+    """Stands in for the YOLOv5 hub model: returns a few full-height bands per frame, no torch work."""
+    names = dict(enumerate(STUB_CLASSES))
+
+    def __init__(self):
+        self.rng = random.Random(0)
+
+    def eval(self):
+        return self
+
+    def __call__(self, img):
+        width, height = img.size
+        records = []
+        for _ in range(self.rng.randint(1, 5)):
+            cls = self.rng.randrange(len(STUB_CLASSES))
+            xmin = self.rng.uniform(0, width - 20)
+            records.append({"xmin": xmin, "ymin": 0.0, "xmax": xmin + self.rng.uniform(5, 80),
+                            "ymax": float(height - 1), "confidence": self.rng.uniform(0.3, 0.99),
+                            "class": cls, "name": STUB_CLASSES[cls]})
+        return StubResults(records)
+
+
+def serveStub(port):
+    """Run the real app with torch.hub.load replaced by the stub model."""
+    import torch
+    torch.hub.load = lambda *args, **kwargs: StubModel()
+    sys.path.append(APP_DIR)
+    os.chdir(APP_DIR)
+    import app
+    app.socketio.run(app.app, host="127.0.0.1", port=port, allow_unsafe_werkzeug=True)
+
+
+##############################################
+# Simulated dashboards (client side)
+##############################################
+class SimulatedDashboard:
+    """One socket.io consumer with a simulated link speed and per-frame processing delay."""
+
+    def __init__(self, url, linkKbps, processingMs):
+        import socketio
+        self.url = url
+        self.linkBytesPerSec = linkKbps * 1000 / 8 if linkKbps > 0 else 0
+        self.processingSec = processingMs / 1000
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.received = 0
+        self.dropped = 0
+        self.lastTime = {}
+        self.client = socketio.Client(reconnection=True)
+        self.client.on("new_detection", self.onFrame)
+
+    def connect(self):
+        self.client.connect(self.url, transports=["websocket", "polling"])
+
+    def disconnect(self):
+        if self.client.connected:
+            self.client.disconnect()
+
+    def onFrame(self, data):
+        # Simulate transfer over a slow link and the dashboard's own rendering cost.
+        size = len(data.get("image", ""))
+        delay = self.processingSec + (size / self.linkBytesPerSec if self.linkBytesPerSec else 0)
+        if delay:
+            time.sleep(delay)
+        now = time.time()
+        source, frame = data.get("source"), data.get("time", 0)
+        with self.lock:
+            self.received += 1
+            if "sentAt" in data:
+                self.latencies.append((now - data["sentAt"]) * 1000)
+            last = self.lastTime.get(source)
+            # Frame numbers restart after /reset; only count forward gaps.
+            if last is not None and frame > last + 1:
+                self.dropped += frame - last - 1
+            self.lastTime[source] = frame
+
+    def drain(self):
+        """Return and clear the latencies gathered since the last call, plus running totals."""
+        with self.lock:
+            latencies, self.latencies = self.latencies, []
+            return latencies, self.received, self.dropped
+
+
+##############################################
+# Driver
+##############################################
+def post(baseUrl, command):
+    request = urllib.request.Request(f"{baseUrl}/{command}", data=b"", method="POST")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def waitForServer(baseUrl, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"{baseUrl}/model", timeout=2).read()
+            return True
+        except Exception:
+            time.sleep(0.5)
+    return False
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def runSoak(args):
+    import psutil
+    baseUrl = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, SPECTROGRAM_FRAME_INTERVAL=str(args.frame_interval))
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve-stub", "--port", str(args.port)],
+                              env=env, stdout=subprocess.DEVNULL if args.quiet_server else None,
+                              stderr=subprocess.DEVNULL if args.quiet_server else None)
+    samples = []
+    dashboards = []
+    try:
+        if not waitForServer(baseUrl, args.startup_timeout):
+            raise SystemExit(f"Server did not come up on {baseUrl} within {args.startup_timeout}s")
+        serverProcess = psutil.Process(server.pid)
+
+        for i in range(args.clients):
+            # Spread link speeds around the requested value so clients are not in lockstep.
+            linkKbps = args.link_kbps * random.uniform(1 - args.link_jitter, 1 + args.link_jitter)
+            dashboard = SimulatedDashboard(baseUrl, linkKbps, args.processing_ms)
+            dashboard.connect()
+            dashboards.append(dashboard)
+        print(f"Connected {len(dashboards)} dashboards to {baseUrl}")
+
+        post(baseUrl, "start")
+        start = time.time()
+        lastReset = lastStop = start
+        lastReceived = 0
+        while time.time() - start < args.duration:
+            time.sleep(args.sample_every)
+            now = time.time()
+            if args.reset_every and now - lastReset >= args.reset_every:
+                post(baseUrl, "reset")
+                lastReset = now
+            if args.stop_every and now - lastStop >= args.stop_every:
+                post(baseUrl, "stop")
+                time.sleep(args.stop_for)
+                post(baseUrl, "start")
+                lastStop = time.time()
+
+            latencies, received, dropped = [], 0, 0
+            for dashboard in dashboards:
+                clientLatencies, clientReceived, clientDropped = dashboard.drain()
+                latencies.extend(clientLatencies)
+                received += clientReceived
+                dropped += clientDropped
+            rss = serverProcess.memory_info().rss / (1024 * 1024)
+            sample = {
+                "t": round(now - start, 1),
+                "rss_mb": round(rss, 1),
+                "delivered_fps": round((received - lastReceived) / args.sample_every / max(1, len(dashboards)), 3),
+                "latency_p50_ms": percentile(latencies, 0.5),
+                "latency_p95_ms": percentile(latencies, 0.95),
+                "received": received,
+                "dropped": dropped
+            }
+            lastReceived = received
+            samples.append(sample)
+            print(f"t={sample['t']:>8}s rss={sample['rss_mb']:>7} MB fps/client={sample['delivered_fps']:<6} "
+                  f"p50={sample['latency_p50_ms']} ms p95={sample['latency_p95_ms']} ms dropped={dropped}")
+        post(baseUrl, "stop")
+    finally:
+        for dashboard in dashboards:
+            dashboard.disconnect()
+        server.terminate()
+        server.wait(timeout=10)
+
+    rssValues = [s["rss_mb"] for s in samples]
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": vars(args),
+        "summary": {
+            "samples": len(samples),
+            "rss_start_mb": rssValues[0] if rssValues else None,
+            "rss_end_mb": rssValues[-1] if rssValues else None,
+            "rss_max_mb": max(rssValues) if rssValues else None,
+            "mean_delivered_fps": statistics.fmean(s["delivered_fps"] for s in samples) if samples else None,
+            "received": samples[-1]["received"] if samples else 0,
+            "dropped": samples[-1]["dropped"] if samples else 0
+        },
+        "samples": samples
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Soak report written to {args.output}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-test the Socket.IO spectrogram stream on localhost.")
+    parser.add_argument("--clients", type=int, default=10, help="Number of simulated dashboards")
+    parser.add_argument("--duration", type=float, default=300, help="Test length in seconds")
+    parser.add_argument("--link-kbps", type=float, default=0, help="Simulated link speed per client (0 = unlimited)")
+    parser.add_argument("--link-jitter", type=float, default=0.2, help="Relative spread of link speeds across clients")
+    parser.add_argument("--processing-ms", type=float, default=0, help="Simulated per-frame processing delay")
+    parser.add_argument("--frame-interval", type=float, default=2, help="Server seconds between frames")
+    parser.add_argument("--reset-every", type=float, default=0, help="Send /reset every N seconds (0 = never)")
+    parser.add_argument("--stop-every", type=float, default=0, help="Send /stop then /start every N seconds")
+    parser.add_argument("--stop-for", type=float, default=5, help="Seconds to stay stopped")
+    parser.add_argument("--sample-every", type=float, default=10, help="Seconds between metric samples")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--quiet-server", action="store_true", help="Discard the server's debug output")
+    parser.add_argument("--serve-stub", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        serveStub(args.port)
+    else:
+        runSoak(args)
+
+
+if __name__ == "__main__":
+    main()
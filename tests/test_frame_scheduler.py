@@ -0,0 +1,85 @@
+# test_frame_scheduler.py
+import os
+import sys
+import time
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, os.path.join(ROOT_DIR, "my-react-app")]
+
+from FrameScheduler import PriorityFrameQueue
+
+
+def drain(queue):
+    served = []
+    while queue:
+        served.append(queue.popleft())
+    return served
+
+
+def test_fifo_serves_in_filename_order():
+    queue = PriorityFrameQueue(policy="fifo")
+    for name, mtime in (("10.jpg", 1.0), ("2.jpg", 2.0), ("1.jpg", 3.0)):
+        queue.push(name, mtime)
+    assert drain(queue) == ["1.jpg", "2.jpg", "10.jpg"]
+    assert queue.stats["served"] == 3
+
+
+def test_newest_policy_serves_latest_write_first():
+    queue = PriorityFrameQueue(policy="newest")
+    for name, mtime in (("a.jpg", 1.0), ("b.jpg", 3.0), ("c.jpg", 2.0)):
+        queue.push(name, mtime)
+    assert drain(queue) == ["b.jpg", "c.jpg", "a.jpg"]
+    assert queue.stats["reordered"] == 2
+
+
+def test_flag_boosts_frames_inside_the_window():
+    queue = PriorityFrameQueue(policy="fifo", boostWindow=1.0)
+    for i, mtime in enumerate((0.0, 10.0, 20.0, 20.5, 30.0)):
+        queue.push(f"{i}.jpg", mtime)
+    queue.flag("flagged.jpg", 20.2)
+    assert drain(queue) == ["2.jpg", "3.jpg", "0.jpg", "1.jpg", "4.jpg"]
+    assert queue.stats["boosted"] == 2
+
+
+def test_superseded_copies_are_skipped_lazily():
+    queue = PriorityFrameQueue(policy="fifo", boostWindow=1.0)
+    for i in range(4):
+        queue.push(f"{i}.jpg", float(i))
+    queue.flag("flagged.jpg", 1.5)
+    queue.flag("flagged.jpg", 1.5)  # A second flag must not re-push frames already boosted
+    assert len(queue.heap) == 6 and len(queue) == 4
+    served = drain(queue)
+    assert sorted(served) == ["0.jpg", "1.jpg", "2.jpg", "3.jpg"]
+    assert not queue.heap and queue.stats["served"] == 4
+
+
+def test_appendleft_frame_is_retried_next():
+    queue = PriorityFrameQueue(policy="newest")
+    queue.push("a.jpg", 1.0)
+    queue.push("b.jpg", 2.0)
+    assert queue.popleft() == "b.jpg"
+    queue.appendleft("b.jpg")
+    assert queue[0] == "b.jpg"
+    assert drain(queue) == ["b.jpg", "a.jpg"]
+
+
+def test_expired_frames_are_dropped_below_the_heap_head():
+    # Under "newest" the stale frames sit at the bottom of the heap, not at its head.
+    queue = PriorityFrameQueue(policy="newest", maxAge=60)
+    now = time.time()
+    for i, age in enumerate((300, 5, 200, 1, 100)):
+        queue.push(f"{i}.jpg", now - age)
+    assert len(queue) == 2
+    assert queue.stats["dropped"] == 3
+    assert sorted(queue.droppedFiles) == ["0.jpg", "2.jpg", "4.jpg"]
+    assert drain(queue) == ["3.jpg", "1.jpg"]
+    assert queue.stats["dropped"] == 3
+
+
+def test_empty_queue_raises_index_error():
+    queue = PriorityFrameQueue()
+    with pytest.raises(IndexError):
+        queue.popleft()
+    with pytest.raises(IndexError):
+        queue[0]
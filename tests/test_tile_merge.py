@@ -0,0 +1,42 @@
+# test_tile_merge.py
+import os
+import sys
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, os.path.join(ROOT_DIR, "my-react-app")]
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+from runModelOnImage import mergeTileDetections
+
+
+def merge(rows):
+    """rows: (x1, y1, x2, y2, score, class, clipped)"""
+    return mergeTileDetections(torch.tensor([row[:4] for row in rows], dtype=torch.float32),
+                               torch.tensor([row[4] for row in rows]),
+                               torch.tensor([row[5] for row in rows], dtype=torch.int64),
+                               [row[6] for row in rows])
+
+
+def test_fragment_inside_complete_box_is_fused():
+    # IoU 0.4 survives NMS; the fragment lies wholly inside the complete box.
+    merged = merge([(600, 0, 700, 100, 0.9, 1, False), (600, 0, 640, 100, 0.8, 1, True)])
+    assert [row[:4] for row in merged] == [[600, 0, 700, 100]]
+
+
+def test_complete_box_absorbs_higher_scoring_fragment():
+    merged = merge([(600, 0, 640, 100, 0.9, 1, True), (600, 0, 700, 100, 0.8, 1, False)])
+    assert [row[:4] for row in merged] == [[600, 0, 700, 100]]
+
+
+def test_fragments_across_a_seam_are_joined():
+    merged = merge([(500, 10, 640, 90, 0.9, 2, True), (630, 10, 760, 90, 0.7, 2, True)])
+    assert [row[:4] for row in merged] == [[500, 10, 760, 90]]
+
+
+def test_other_class_and_separate_boxes_are_kept():
+    merged = merge([(600, 0, 700, 100, 0.9, 1, False),
+                    (600, 0, 640, 100, 0.8, 2, True),
+                    (680, 0, 900, 100, 0.7, 1, False)])
+    assert len(merged) == 3
@@ -0,0 +1,97 @@
+# test_work_broker.py
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIR, os.path.join(ROOT_DIR, "my-react-app")]
+
+from WorkBroker import WorkBroker
+
+LEASE = 0.05
+
+
+def expire():
+    time.sleep(LEASE * 2)
+
+
+def test_items_are_leased_once_and_carry_options():
+    broker = WorkBroker(leaseSeconds=60)
+    ids = broker.submit(["a.jpg", "b.jpg", "c.jpg"], {"tiled": True})
+    first = broker.lease("w1", maxItems=2)
+    second = broker.lease("w2", maxItems=2)
+    assert [item["id"] for item in first + second] == ids
+    assert all(item["options"] == {"tiled": True} and item["attempts"] == 1 for item in first + second)
+    assert broker.lease("w3") == []
+
+
+def test_expired_lease_is_reclaimed_and_retried():
+    broker = WorkBroker(leaseSeconds=LEASE, maxAttempts=3)
+    itemId, = broker.submit(["a.jpg"])
+    broker.lease("w1")
+    expire()
+    retried, = broker.lease("w2")
+    assert retried["id"] == itemId and retried["attempts"] == 2
+    assert broker.stats["retried"] == 1
+    assert broker.status()["nodes"]["w1"]["reclaimed"] == 1
+
+
+def test_heartbeat_keeps_the_lease():
+    broker = WorkBroker(leaseSeconds=LEASE * 4)
+    broker.submit(["a.jpg"])
+    broker.lease("w1")
+    for _ in range(4):
+        time.sleep(LEASE)
+        assert broker.heartbeat("w1") == 1
+    assert broker.lease("w2") == []
+
+
+def test_item_is_given_up_after_max_attempts():
+    broker = WorkBroker(leaseSeconds=LEASE, maxAttempts=2)
+    broker.submit(["a.jpg"])
+    broker.lease("w1")
+    expire()
+    broker.lease("w2")
+    expire()
+    result, = broker.collect()
+    assert result["file"] == "a.jpg" and result["attempts"] == 2
+    assert result["error"] == "Worker w2 stopped responding"
+    assert broker.stats["failed"] == 1 and broker.outstanding() == 0
+
+
+def test_late_duplicate_ack_is_ignored():
+    broker = WorkBroker(leaseSeconds=LEASE, maxAttempts=3)
+    itemId, = broker.submit(["a.jpg"])
+    broker.lease("w1")
+    expire()
+    broker.lease("w2")
+    assert broker.complete("w2", itemId, [{"name": "5G"}])
+    assert not broker.complete("w1", itemId, [])
+    result, = broker.collect()
+    assert result["worker"] == "w2" and result["detections"] == [{"name": "5G"}]
+    assert broker.stats["completed"] == 1 and broker.stats["duplicates"] == 1
+
+
+def test_late_ack_after_reclaim_completes_and_unqueues_the_item():
+    broker = WorkBroker(leaseSeconds=LEASE, maxAttempts=3)
+    itemId, = broker.submit(["a.jpg"])
+    broker.lease("w1")
+    expire()
+    broker.status()  # Reclaims the lease and requeues the item
+    assert broker.complete("w1", itemId, [])
+    assert broker.lease("w2") == []
+    assert len(broker.collect()) == 1
+
+
+def test_fail_retries_until_max_attempts():
+    broker = WorkBroker(leaseSeconds=60, maxAttempts=2)
+    itemId, = broker.submit(["a.jpg"])
+    broker.lease("w1")
+    broker.fail("w2", itemId, "not the holder")  # Ignored: w2 holds no lease on it
+    assert broker.lease("w2") == []
+    broker.fail("w1", itemId, "decode error")
+    assert broker.lease("w2")[0]["attempts"] == 2
+    broker.fail("w2", itemId, "decode error")
+    result, = broker.collect()
+    assert result["error"] == "decode error"
+    assert broker.stats["retried"] == 1 and broker.stats["failed"] == 1